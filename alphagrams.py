@@ -0,0 +1,159 @@
+# Index from alphagrams (the letters of a word in sorted order) to the words they spell, e.g. "AERT" to
+# RATE, TARE, TEAR. Every word a rack can make is found by looking up the alphagrams of the rack's
+# sub-multisets, with blanks expanded to each letter they could stand for, without walking the dawg.
+import bisect
+import itertools
+import mmap
+import struct
+import sys
+from array import array
+
+from dawg import *
+
+# Binary alphagram index format, all integers little-endian:
+#   header         magic b"ALPH", u16 version, u16 longest word length, u32 alphagram count, u32 word bytes
+#   length_starts  u32 * (longest word length + 2), index of the first alphagram of each length
+#   word_offsets   u32 * (alphagram count + 1), where the words of each alphagram start in the words section
+#   alphagrams     the alphagrams sorted by length and then alphabetically, as ASCII with no separators
+#   words          the words of each alphagram in alphabetical order, as ASCII with no separators
+# Alphagrams and words of the same length are all the same size, so neither needs a separator.
+ALPHAGRAM_MAGIC = b"ALPH"
+ALPHAGRAM_VERSION = 1
+ALPHAGRAM_HEADER = struct.Struct("<4sHHII")
+
+
+def alphagram(word):
+    return "".join(sorted(word))
+
+
+def save_alphagrams(words, path):
+    groups = {}
+    for word in sorted(words):
+        groups.setdefault(alphagram(word), []).append(word)
+    keys = sorted(groups, key=lambda key: (len(key), key))
+    max_length = max(map(len, keys))
+
+    length_starts = array("I", [0] * (max_length + 2))
+    for key in keys:
+        length_starts[len(key) + 1] += 1
+    for length in range(1, max_length + 2):
+        length_starts[length] += length_starts[length - 1]
+    word_offsets = array("I", [0])
+    for key in keys:
+        word_offsets.append(word_offsets[-1] + len(key) * len(groups[key]))
+    sections = [length_starts, word_offsets]
+    if sys.byteorder == "big":
+        for section in sections:
+            section.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(ALPHAGRAM_HEADER.pack(ALPHAGRAM_MAGIC, ALPHAGRAM_VERSION, max_length, len(keys), word_offsets[-1]))
+        for section in sections:
+            f.write(section.tobytes())
+        f.write("".join(keys).encode("ascii"))
+        f.write("".join(word for key in keys for word in groups[key]).encode("ascii"))
+
+
+# alphagram index read from a memory-mapped file. opening one only maps the file, the alphagrams of each
+# word length are read into a dict the first time a word of that length is looked up, and words are read
+# from the file as they are found. pickling one only stores the path
+class AlphagramIndex:
+    def __init__(self, file_map, max_length, num_alphagrams, path=None):
+        self.path = path
+        self.file_map = file_map
+        self.max_length = max_length
+        start_offset = ALPHAGRAM_HEADER.size // 4
+        offsets_offset = start_offset + max_length + 2
+        alphagrams_offset = (offsets_offset + num_alphagrams + 1) * 4
+        ints = memoryview(file_map)[:alphagrams_offset].cast("I")
+        self.length_starts = ints[start_offset:offsets_offset]
+        self.word_offsets = ints[offsets_offset:]
+        # alphagrams of one length are stored together, note where each length's run starts in the file
+        self.alphagram_starts = [alphagrams_offset]
+        for length in range(max_length + 1):
+            count = self.length_starts[length + 1] - self.length_starts[length]
+            self.alphagram_starts.append(self.alphagram_starts[-1] + count * length)
+        self.words_offset = self.alphagram_starts[-1]
+        # _positions results, by length
+        self.positions = {}
+
+    def __reduce__(self):
+        if self.path is None:
+            raise Exception("Only indexes opened with open_alphagrams can be pickled")
+        return open_alphagrams, (self.path,)
+
+    # the words spelled by the letters of key in any order, alphabetically
+    def lookup(self, key):
+        return self._words(alphagram(key.upper()))
+
+    # position of each alphagram of a length among the alphagrams of that length. read from the file the
+    # first time a word of that length is looked up
+    def _positions(self, length):
+        positions = self.positions.get(length)
+        if positions is None:
+            start = self.alphagram_starts[length]
+            text = self.file_map[start:self.alphagram_starts[length + 1]].decode("ascii")
+            positions = {text[i:i + length]: i // length for i in range(0, len(text), length)}
+            self.positions[length] = positions
+        return positions
+
+    def _words(self, key):
+        length = len(key)
+        if not 0 < length <= self.max_length:
+            return []
+        position = self._positions(length).get(key)
+        if position is None:
+            return []
+        position += self.length_starts[length]
+        start = self.words_offset + self.word_offsets[position]
+        text = self.file_map[start:self.words_offset + self.word_offsets[position + 1]].decode("ascii")
+        return [text[i:i + length] for i in range(0, len(text), length)]
+
+    # alphagrams of every sub-multiset of rack with min_length or more tiles, each blank ("?" or "%")
+    # expanded to every letter it could stand for
+    def rack_alphagrams(self, rack, min_length=2):
+        letters = sorted(tile.upper() for tile in rack if tile not in BLANK_TILES)
+        blanks = len(rack) - len(letters)
+        # the sub-multisets are built up a letter at a time, in alphabetical order so they come out sorted
+        subsets = [""]
+        for letter, group in itertools.groupby(letters):
+            repeats = len(list(group))
+            subsets = [subset + letter * count for subset in subsets for count in range(repeats + 1)]
+        keys = {subset for subset in subsets if min_length <= len(subset) <= self.max_length}
+        # then each blank is inserted into every subset as every letter, blanks in alphabetical order so
+        # two blanks aren't tried both ways round. (alphagram, code of the last blank letter) pairs
+        expanded = [(subset, 0) for subset in subsets]
+        for _ in range(blanks):
+            expanded = [(subset[:i] + letter + subset[i:], code)
+                        for subset, last_code in expanded
+                        for code, letter in enumerate(LETTERS[last_code:], last_code)
+                        for i in (bisect.bisect(subset, letter),)]
+            keys.update(subset for subset, _ in expanded if min_length <= len(subset) <= self.max_length)
+        return keys
+
+    # words of at least min_length letters that can be made from the tiles of rack, alphabetically
+    def rack_words(self, rack, min_length=2):
+        return sorted(word for key in self.rack_alphagrams(rack, min_length) for word in self._words(key))
+
+    # words that use every tile of rack, alphabetically
+    def anagrams(self, rack):
+        return self.rack_words(rack, len(rack))
+
+
+# memory-map an alphagram index file written by save_alphagrams
+def open_alphagrams(path):
+    if sys.byteorder == "big":
+        raise Exception("Alphagram index files can only be mapped on little-endian hosts")
+    with open(path, "rb") as f:
+        file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(file_map) < ALPHAGRAM_HEADER.size:
+        raise Exception(f"{path} is not an alphagram index file")
+    magic, version, max_length, num_alphagrams, word_bytes = ALPHAGRAM_HEADER.unpack_from(file_map)
+    if magic != ALPHAGRAM_MAGIC:
+        raise Exception(f"{path} is not an alphagram index file")
+    if version != ALPHAGRAM_VERSION:
+        raise Exception(f"{path} has alphagram index version {version}, expected {ALPHAGRAM_VERSION}")
+    index = AlphagramIndex(file_map, max_length, num_alphagrams, path)
+    if len(file_map) != index.words_offset + word_bytes:
+        raise Exception(f"{path} is truncated or corrupt")
+    return index
@@ -0,0 +1,71 @@
+# Throughput of apply_move/undo_move cycles against copying the board for every move tried, over the best
+# moves of the midgame, endgame and double-blank positions of the fixed corpus. Every cycle is checked to
+# leave the board exactly as it was first: the state buffer, anchors, zobrist hash and words on the board.
+# Run from the repository root:
+#   python benchmarks/apply_undo.py [moves per position]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from positions import load_positions, set_up_board
+
+CYCLES = 200
+
+
+def snapshot(game):
+    return (game.state.tobytes(), [sorted(anchors) for anchors in game.anchors], game.zobrist_hash,
+            list(game.words_on_board))
+
+
+# cycles per second of playing and taking back each move in turn
+def time_apply_undo(game, moves):
+    start = time.perf_counter()
+    for _ in range(CYCLES // len(moves) + 1):
+        for move in moves:
+            game.undo_move(game.apply_move(move))
+    return (CYCLES // len(moves) + 1) * len(moves) / (time.perf_counter() - start)
+
+
+# cycles per second of playing each move on a copy of the board
+def time_clone(game, moves):
+    start = time.perf_counter()
+    for _ in range(CYCLES // len(moves) + 1):
+        for move in moves:
+            game.clone().apply_move(move)
+    return (CYCLES // len(moves) + 1) * len(moves) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    positions = [position for position in load_positions() if position["kind"] != "opening"]
+
+    print(f"{'position':<20}{'moves':>6}{'apply+undo/s':>14}{'clone+apply/s':>15}{'speedup':>9}")
+    # seconds per cycle of each position, for the mean over positions
+    seconds = [[], []]
+    for position in positions:
+        game = set_up_board(lexicon, position)
+        moves = game.top_moves(list(position["rack"]), count)
+        if not moves:
+            continue
+        before = snapshot(game)
+        for move in moves:
+            undo = game.apply_move(move)
+            nested = game.top_moves(list(position["rack"]), 1)
+            if nested:
+                game.undo_move(game.apply_move(nested[0]))
+            game.undo_move(undo)
+            if snapshot(game) != before:
+                raise Exception(f"undo_move didn't restore {position['name']} after {move}")
+        undo_rate = time_apply_undo(game, moves)
+        clone_rate = time_clone(game, moves)
+        seconds[0].append(1 / undo_rate)
+        seconds[1].append(1 / clone_rate)
+        print(f"{position['name']:<20}{len(moves):>6}{undo_rate:>14.0f}{clone_rate:>15.0f}"
+              f"{undo_rate / clone_rate:>8.2f}x")
+    undo_rate, clone_rate = (len(times) / sum(times) for times in seconds)
+    print(f"{'all positions':<26}{undo_rate:>14.0f}{clone_rate:>15.0f}{undo_rate / clone_rate:>8.2f}x")
+    print("every move was taken back exactly")
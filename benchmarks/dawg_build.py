@@ -0,0 +1,44 @@
+# Compares DAWG build time of the __repr__-hashing minimize() against minimize_linear() on the full lexicon
+# and checks that both produce the same graph. Run from the repository root:
+#   python benchmarks/dawg_build.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+
+
+# the text lexicon isn't shipped with the repo, fall back to reading the words back out of the pickle
+def load_word_list():
+    if os.path.exists("lexicon/scrabble_words_complete.txt"):
+        with open("lexicon/scrabble_words_complete.txt", "r") as f:
+            return [word.strip("\n") for word in f]
+    return list(dawg_words(load_pickle("lexicon/scrabble_words_complete.pickle")))
+
+
+def time_build(word_list, minimize_fn):
+    start = time.perf_counter()
+    root = build_dawg(word_list, minimize_fn)
+    return root, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    word_list = load_word_list()
+    print(f"{len(word_list)} words")
+
+    repr_root, repr_time = time_build(word_list, minimize)
+    linear_root, linear_time = time_build(word_list, minimize_linear)
+
+    repr_nodes = CompactDawg.from_node(repr_root).num_nodes
+    linear_nodes = CompactDawg.from_node(linear_root).num_nodes
+    print(f"minimize:        {repr_time:6.2f}s  {repr_nodes} nodes")
+    print(f"minimize_linear: {linear_time:6.2f}s  {linear_nodes} nodes")
+    print(f"speedup: {repr_time / linear_time:.1f}x")
+
+    if repr_nodes != linear_nodes:
+        raise Exception(f"Node counts differ: {repr_nodes} != {linear_nodes}")
+    if list(dawg_words(repr_root)) != list(dawg_words(linear_root)):
+        raise Exception("Graphs accept different languages")
+    print("same node count and language")
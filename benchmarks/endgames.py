@@ -0,0 +1,138 @@
+# Endgame solver benchmark over the stored two-player endgames in endgames.json next to this file: the
+# board and both racks of a seeded game of the greedy solver against itself, once the bag has run out and
+# the racks are down to MAX_TILES tiles between them. For each endgame it reports the exact spread for the
+# side to move, what the greedy best move is worth against best replies, and the depth, nodes and time the
+# search took. First it checks that a solve cut short at CHECK_DEPTHS plies never does worse than the greedy
+# move (see check_depth_limited). Run from the repository root:
+#   python benchmarks/endgames.py [time limit in seconds]
+#   python benchmarks/endgames.py --generate [count]
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from board import ScrabbleBoard, board_rows, new_tile_bag, refill_word_rack
+from endgame import SOLVED, EndgameSolver
+from positions import set_up_board
+
+ENDGAMES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "endgames.json")
+# endgames with both racks full are far too big to solve exactly in Python, the stored ones are from later on
+MAX_TILES = 8
+# depth limits of the check against the greedy move
+CHECK_DEPTHS = (1, 2, 3)
+
+
+# play the greedy solver against itself from seed until the bag is empty and the racks hold at most
+# MAX_TILES tiles, returns the endgame position or None if the game ended first
+def deal_endgame(lexicon, seed):
+    rng = random.Random(seed)
+    tile_bag = new_tile_bag()
+    racks = []
+    for _ in range(2):
+        rack, new_letters = refill_word_rack([], tile_bag, rng)
+        [tile_bag.remove(letter) for letter in new_letters]
+        racks.append(rack)
+    game = ScrabbleBoard(lexicon)
+    move = game.get_start_move
+    player = passes = 0
+    while tile_bag or len(racks[0]) + len(racks[1]) > MAX_TILES:
+        rack = move(racks[player])
+        move = game.get_best_move
+        passes = 0 if game.best_word else passes + 1
+        if passes == 2:
+            return None
+        rack, new_letters = refill_word_rack(rack, tile_bag, rng)
+        [tile_bag.remove(letter) for letter in new_letters]
+        racks[player] = rack
+        if not rack:
+            return None
+        player = 1 - player
+    return {"name": f"endgame-{seed}", "kind": "endgame", "rows": board_rows(game),
+            "rack": "".join(racks[player]), "opponent_rack": "".join(racks[1 - player])}
+
+
+# spread for the side to move of playing move, then best replies from both sides, searched by a solver of
+# its own to max_depth plies after move
+def move_value(solver, move, time_limit, max_depth=None):
+    undo, rest = solver.play(solver.racks[0], move)
+    try:
+        if not rest:
+            return move[3] + 2 * solver.rack_value(solver.racks[1])
+        replies = EndgameSolver(solver.board, solver.racks[1], rest)
+        if max_depth == 0:
+            return move[3] - replies.static_value(*replies.racks)
+        return move[3] - replies.solve(time_limit, max_depth)["value"]
+    finally:
+        solver.take_back(undo)
+
+
+# a solve cut short at each of CHECK_DEPTHS plies against the greedy move. the value it returns can't be less
+# than the greedy move searched as deep by a solver of its own, and if a search to the end of the game
+# finishes in time_limit seconds, its first move can't be worth less than the greedy move either. returns
+# whether that search finished
+def check_depth_limited(game, endgame, time_limit):
+    racks = list(endgame["rack"]), list(endgame["opponent_rack"])
+    reference = EndgameSolver(game, *racks)
+    exact = reference.solve(time_limit)["exact"]
+    greedy_move = reference.ordered_moves(reference.racks[0], None)[0]
+    if greedy_move is None:
+        return exact
+    greedy = reference.move_value(greedy_move, SOLVED) if exact else None
+    for depth in CHECK_DEPTHS:
+        solver = EndgameSolver(game, *racks)
+        result = solver.solve(max_depth=depth)
+        if not result["exact"]:
+            greedy_value = move_value(solver, greedy_move, None, depth - 1)
+            if result["value"] < greedy_value:
+                raise Exception(f"{endgame['name']} solved to depth {depth} is worth {result['value']}, less "
+                                f"than {greedy_value} for the greedy move")
+        if exact:
+            value = reference.move_value(result["line"][0], SOLVED)
+            if value < greedy:
+                raise Exception(f"{endgame['name']} solved to depth {depth} plays a move worth {value}, less "
+                                f"than {greedy} for the greedy move")
+    return exact
+
+
+if __name__ == "__main__":
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    if sys.argv[1:2] == ["--generate"]:
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+        endgames = []
+        seed = 0
+        while len(endgames) < count:
+            endgame = deal_endgame(lexicon, seed)
+            if endgame is not None:
+                endgames.append(endgame)
+            seed += 1
+        with open(ENDGAMES_PATH, "w") as f:
+            json.dump(endgames, f, indent=1)
+        print(f"{count} endgames written to {ENDGAMES_PATH}")
+        sys.exit()
+
+    time_limit = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with open(ENDGAMES_PATH) as f:
+        endgames = json.load(f)
+    checked = sum(check_depth_limited(set_up_board(lexicon, endgame), endgame, time_limit) for endgame in endgames)
+    print(f"solves cut short at {', '.join(map(str, CHECK_DEPTHS))} plies never did worse than the greedy move, "
+          f"{checked} of {len(endgames)} endgames checked against exact values")
+    print(f"{'endgame':<14}{'racks':>17}{'greedy':>8}{'solved':>8}{'gain':>6}{'depth':>7}{'exact':>7}"
+          f"{'nodes':>8}{'seconds':>9}{'first move':>16}")
+    gains = []
+    for endgame in endgames:
+        game = set_up_board(lexicon, endgame)
+        solver = EndgameSolver(game, list(endgame["rack"]), list(endgame["opponent_rack"]))
+        result = solver.solve(time_limit)
+        first = result["line"][0]
+        greedy_move = solver.ordered_moves(solver.racks[0], None)[0]
+        greedy = result["value"] if first == greedy_move else move_value(solver, greedy_move, time_limit)
+        gains.append(result["value"] - greedy)
+        racks = f"{endgame['rack']}/{endgame['opponent_rack']}"
+        print(f"{endgame['name']:<14}{racks:>17}{greedy:>8}{result['value']:>8}{gains[-1]:>6}{result['depth']:>7}"
+              f"{str(result['exact']):>7}{result['nodes']:>8}{result['seconds']:>9.2f}"
+              f"{'pass' if first is None else first[2]:>16}")
+    print(f"solving beat the greedy move by {sum(gains) / len(gains):.1f} points on average, "
+          f"in {sum(gain > 0 for gain in gains)} of {len(gains)} endgames")
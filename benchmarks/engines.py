@@ -0,0 +1,49 @@
+# Compares the dawg and gaddag move generators over the fixed position corpus: checks that both find
+# exactly the same moves and reports moves generated per second for each. Run from the repository root:
+#   python benchmarks/engines.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from positions import load_positions, set_up_board, play_position
+
+RUNS = 5
+ENGINES = ("dawg", "gaddag")
+
+
+# best of RUNS timings of one position, returns the moves found and the time taken
+def time_position(lexicon, gaddag, position, engine):
+    times = []
+    for _ in range(RUNS):
+        game = set_up_board(lexicon, position, engine=engine, gaddag_root=gaddag)
+        start = time.perf_counter()
+        play_position(game, position, keep=None)
+        times.append(time.perf_counter() - start)
+    return game.all_moves, min(times)
+
+
+if __name__ == "__main__":
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    gaddag = open_dawg("lexicon/scrabble_words_complete.gaddag")
+    total_moves = 0
+    total_times = {engine: 0 for engine in ENGINES}
+    print(f"{'position':<20}{'moves':>8}" + "".join(f"{engine + ' moves/s':>16}" for engine in ENGINES))
+    for position in load_positions():
+        results = {engine: time_position(lexicon, gaddag, position, engine) for engine in ENGINES}
+        moves = results["dawg"][0]
+        if results["gaddag"][0] != moves:
+            raise Exception(f"Engines found different moves for {position['name']}")
+
+        total_moves += len(moves)
+        line = f"{position['name']:<20}{len(moves):>8}"
+        for engine in ENGINES:
+            elapsed = results[engine][1]
+            total_times[engine] += elapsed
+            line += f"{len(moves) / elapsed:>16.0f}"
+        print(line)
+    print(f"{'total':<20}{total_moves:>8}" +
+          "".join(f"{total_moves / total_times[engine]:>16.0f}" for engine in ENGINES))
+    print("both engines found the same moves")
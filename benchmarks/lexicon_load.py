@@ -0,0 +1,54 @@
+# Compares lexicon startup cost of unpickling the Node graph against memory-mapping the binary lexicon,
+# both inside this process and for a fresh interpreter that loads the lexicon and looks up one word.
+# Run from the repository root:
+#   python benchmarks/lexicon_load.py
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+
+PICKLE_PATH = "lexicon/scrabble_words_complete.pickle"
+DAWG_PATH = "lexicon/scrabble_words_complete.dawg"
+RUNS = 5
+
+LOADERS = {
+    "pickle": f"load_pickle({PICKLE_PATH!r})",
+    "pickle + pack": f"CompactDawg.from_node(load_pickle({PICKLE_PATH!r}))",
+    "mmap": f"open_dawg({DAWG_PATH!r})",
+}
+
+
+def time_in_process(expression):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        lexicon = eval(expression)
+        if not find_in_dawg("QUIXOTIC", lexicon):
+            raise Exception("Lexicon failed lookup")
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_script(script):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def time_new_process(expression):
+    return time_script(f"from dawg import *\nlexicon = {expression}\nassert find_in_dawg('QUIXOTIC', lexicon)\n")
+
+
+if __name__ == "__main__":
+    print(f"{'loader':<14}{'in process':>12}{'new process':>13}")
+    for name, expression in LOADERS.items():
+        print(f"{name:<14}{time_in_process(expression) * 1000:>10.2f}ms"
+              f"{time_new_process(expression) * 1000:>11.2f}ms")
+    print(f"(interpreter start + import dawg alone: {time_script('import dawg') * 1000:.1f}ms)")
@@ -0,0 +1,51 @@
+# Measures move generation throughput in DAWG nodes visited per second over the fixed position corpus.
+# A node is one call to _left_part or _extend_right. Run from the repository root:
+#   python benchmarks/move_generation.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from board import ScrabbleBoard
+from positions import load_positions, set_up_board, play_position
+
+RUNS = 5
+
+
+# counts generator calls without adding any work to the plain ScrabbleBoard used for timing
+class CountingBoard(ScrabbleBoard):
+    nodes_visited = 0
+
+    def _extend_right(self, *args):
+        self.nodes_visited += 1
+        super()._extend_right(*args)
+
+    def _left_part(self, *args):
+        self.nodes_visited += 1
+        super()._left_part(*args)
+
+
+if __name__ == "__main__":
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    total_nodes = 0
+    total_time = 0
+    print(f"{'position':<20}{'nodes':>9}{'time':>10}{'nodes/s':>12}")
+    for position in load_positions():
+        counting_game = set_up_board(lexicon, position, CountingBoard)
+        play_position(counting_game, position)
+        nodes = counting_game.nodes_visited
+
+        times = []
+        for _ in range(RUNS):
+            game = set_up_board(lexicon, position)
+            start = time.perf_counter()
+            play_position(game, position)
+            times.append(time.perf_counter() - start)
+        elapsed = min(times)
+
+        total_nodes += nodes
+        total_time += elapsed
+        print(f"{position['name']:<20}{nodes:>9}{elapsed * 1000:>8.1f}ms{nodes / elapsed:>12.0f}")
+    print(f"{'total':<20}{total_nodes:>9}{total_time * 1000:>8.1f}ms{total_nodes / total_time:>12.0f}")
@@ -0,0 +1,62 @@
+# Compares opening move generation by the dawg and gaddag searches against lookups in the alphagram index:
+# checks that all three find exactly the same moves for random racks and reports the mean time per opening
+# for racks with no, one and two blanks. Run from the repository root:
+#   python benchmarks/openings.py [racks per blank count]
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from alphagrams import open_alphagrams
+from board import ScrabbleBoard
+
+TILE_BAG = list("AAAAAAAAABBCCDDDDEEEEEEEEEEEEFFGGGHHIIIIIIIIIJKLLLLMMNNNNNNOOOOOOOOPPQRRRRRRSSSSTTTTTTUUUUVVWWXYYZ%%")
+
+
+# racks of seven tiles drawn from the bag with exactly blanks blanks
+def draw_racks(rng, blanks, count):
+    racks = []
+    while len(racks) < count:
+        rack = rng.sample(TILE_BAG, 7)
+        if rack.count("%") == blanks:
+            racks.append(rack)
+    return racks
+
+
+# every opening move of every rack, and the mean time per rack
+def time_openings(lexicon, racks, board_args):
+    moves = []
+    start = time.perf_counter()
+    for rack in racks:
+        game = ScrabbleBoard(lexicon, **board_args)
+        game.get_start_move(list(rack), keep=None)
+        moves.append(game.all_moves)
+    return moves, (time.perf_counter() - start) / len(racks)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    searches = {
+        "dawg": {},
+        "gaddag": {"engine": "gaddag", "gaddag_root": open_dawg("lexicon/scrabble_words_complete.gaddag")},
+        "alphagrams": {"alphagrams": open_alphagrams("lexicon/scrabble_words_complete.alphagrams")},
+    }
+    # the index reads the alphagrams of each word length on first use, time the lookups rather than that
+    searches["alphagrams"]["alphagrams"].rack_words("AEIOU%%")
+    rng = random.Random(0)
+
+    print(f"{'blanks':<8}" + "".join(f"{name:>14}" for name in searches) + f"{'speedup':>10}")
+    for blanks in (0, 1, 2):
+        racks = draw_racks(rng, blanks, count)
+        results = {name: time_openings(lexicon, racks, board_args) for name, board_args in searches.items()}
+        for name, (moves, _) in results.items():
+            if moves != results["dawg"][0]:
+                raise Exception(f"{name} found different opening moves with {blanks} blanks")
+        times = {name: seconds for name, (_, seconds) in results.items()}
+        print(f"{blanks:<8}" + "".join(f"{times[name] * 1000:>12.2f}ms" for name in searches) +
+              f"{times['dawg'] / times['alphagrams']:>9.2f}x")
+    print("every search found the same opening moves")
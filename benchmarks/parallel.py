@@ -0,0 +1,55 @@
+# Compares serial move generation against the process pool over the fixed position corpus: checks that
+# every worker count finds exactly the same moves and reports the time taken and speedup for each. Run from
+# the repository root:
+#   python benchmarks/parallel.py [engine] [worker counts...]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from positions import load_positions, set_up_board, play_position
+
+RUNS = 3
+
+
+# best of RUNS timings of one position, returns the moves found and the time taken
+def time_position(lexicon, gaddag, position, engine, workers):
+    times = []
+    for _ in range(RUNS):
+        game = set_up_board(lexicon, position, engine=engine, gaddag_root=gaddag, workers=workers)
+        start = time.perf_counter()
+        play_position(game, position, keep=None)
+        times.append(time.perf_counter() - start)
+    return game.all_moves, min(times)
+
+
+if __name__ == "__main__":
+    engine = sys.argv[1] if len(sys.argv) > 1 else "dawg"
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, os.cpu_count() or 1})
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    gaddag = open_dawg("lexicon/scrabble_words_complete.gaddag")
+    positions = load_positions()
+    # start every pool before timing anything
+    for workers in worker_counts:
+        play_position(set_up_board(lexicon, positions[-1], engine=engine, gaddag_root=gaddag, workers=workers),
+                      positions[-1])
+
+    total_times = {workers: 0 for workers in worker_counts}
+    print(f"{os.cpu_count()} cpus, {engine} engine")
+    print(f"{'position':<20}" + "".join(f"{str(workers) + ' workers':>12}" for workers in worker_counts))
+    for position in positions:
+        results = {workers: time_position(lexicon, gaddag, position, engine, workers) for workers in worker_counts}
+        moves = results[worker_counts[0]][0]
+        line = f"{position['name']:<20}"
+        for workers in worker_counts:
+            if results[workers][0] != moves:
+                raise Exception(f"{workers} workers found different moves for {position['name']}")
+            total_times[workers] += results[workers][1]
+            line += f"{results[workers][1] * 1000:>10.1f}ms"
+        print(line)
+    print(f"{'total':<20}" + "".join(f"{total_times[workers]:>11.2f}s" for workers in worker_counts))
+    print(f"{'speedup':<20}" + "".join(f"{total_times[worker_counts[0]] / total_times[workers]:>11.2f}x"
+                                       for workers in worker_counts))
+    print("every worker count found the same moves")
@@ -0,0 +1,32 @@
+# Fixed corpus of benchmark positions, stored in positions.json next to this file. Each position has a
+# name, a kind (opening, midgame, endgame or double-blank), the 15 board rows with "." for empty squares
+# and the rack to move with. Lowercase letters on the board are blanks.
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from board import ScrabbleBoard, place_rows
+
+POSITIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "positions.json")
+
+
+def load_positions():
+    with open(POSITIONS_PATH, "r") as f:
+        return json.load(f)
+
+
+# build a board holding a position's tiles, board_args are passed on to the board class
+def set_up_board(lexicon, position, board_class=ScrabbleBoard, **board_args):
+    game = board_class(lexicon, **board_args)
+    place_rows(game, position["rows"])
+    return game
+
+
+# play the position's best move, the opening move if the board is empty. keep is passed on to the board
+def play_position(game, position, keep=1):
+    rack = list(position["rack"])
+    if position["kind"] == "opening":
+        return game.get_start_move(rack, keep)
+    return game.get_best_move(rack, keep)
@@ -0,0 +1,61 @@
+# Measures branch-and-bound pruning of best-move search over the fixed position corpus: for each engine and
+# pruning level, checks that the best moves are the same as an exhaustive search and reports how many
+# anchors and branches were pruned and the speedup over the exhaustive search. Run from the repository root:
+#   python benchmarks/pruning.py [keep]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from positions import load_positions, set_up_board, play_position
+
+RUNS = 5
+ENGINES = ("dawg", "gaddag")
+PRUNE_LEVELS = (False, "anchors", "branches")
+
+
+# best of RUNS timings of one position, returns the moves kept, the time taken and the pruning counts
+def time_position(lexicon, gaddag, position, engine, prune, keep):
+    times = []
+    for _ in range(RUNS):
+        game = set_up_board(lexicon, position, engine=engine, gaddag_root=gaddag, prune=prune)
+        start = time.perf_counter()
+        play_position(game, position, keep)
+        times.append(time.perf_counter() - start)
+    return game.all_moves, min(times), game.prune_stats
+
+
+def rate(pruned, total):
+    return f"{pruned}/{total} ({pruned / total * 100 if total else 0:.0f}%)"
+
+
+if __name__ == "__main__":
+    keep = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    gaddag = open_dawg("lexicon/scrabble_words_complete.gaddag")
+    positions = load_positions()
+    print(f"{'engine':<8}{'prune':<10}{'time':>9}{'speedup':>9}{'anchors pruned':>22}{'branches pruned':>24}")
+    for engine in ENGINES:
+        total_times = {prune: 0 for prune in PRUNE_LEVELS}
+        total_stats = {prune: {} for prune in PRUNE_LEVELS}
+        for position in positions:
+            exhaustive_moves = None
+            for prune in PRUNE_LEVELS:
+                moves, elapsed, stats = time_position(lexicon, gaddag, position, engine, prune, keep)
+                if exhaustive_moves is None:
+                    exhaustive_moves = moves
+                elif moves != exhaustive_moves:
+                    raise Exception(f"Pruning level {prune} changed the best moves for {position['name']}")
+                total_times[prune] += elapsed
+                for name, count in stats.items():
+                    total_stats[prune][name] = total_stats[prune].get(name, 0) + count
+
+        for prune in PRUNE_LEVELS:
+            stats = total_stats[prune]
+            print(f"{engine:<8}{str(prune):<10}{total_times[prune]:>8.2f}s"
+                  f"{total_times[False] / total_times[prune]:>8.2f}x"
+                  f"{rate(stats['anchors_pruned'], stats['anchors']):>22}"
+                  f"{rate(stats['branches_pruned'], stats['branches']):>24}")
+    print(f"every pruning level kept the same {keep} best moves as the exhaustive search")
@@ -0,0 +1,105 @@
+# Throughput of the lexicon query API on the full word list: batch validation, wildcard patterns, anagrams
+# and sub-anagrams of racks with blanks, and hooks. A sample of every query type is checked against a
+# brute-force scan of the word list first. Run from the repository root:
+#   python benchmarks/queries.py
+import collections
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from dawg_build import load_word_list
+
+QUERIES = 200
+CHECKED = 20
+TILE_BAG = "AAAAAAAAABBCCDDDDEEEEEEEEEEEEFFGGGHHIIIIIIIIIJKLLLLMMNNNNNNOOOOOOOOPPQRRRRRRSSSSTTTTTTUUUUVVWWXYYZ??"
+
+
+# patterns made from lexicon words: a few letters turned into "?", and some cut short with a "*"
+def make_patterns(rng, word_list):
+    patterns = []
+    for word in rng.sample([word for word in word_list if len(word) >= 4], QUERIES):
+        letters = [letter if rng.random() < 0.75 else "?" for letter in word]
+        if rng.random() < 0.5:
+            letters = letters[:rng.randrange(3, len(letters))] + ["*"]
+        patterns.append("".join(letters))
+    return patterns
+
+
+def brute_force_match(word_list, pattern):
+    regex = re.compile(pattern.replace("?", ".").replace("*", ".*") + "$")
+    return [word for word in word_list if regex.match(word)]
+
+
+# words of at least min_length letters that the rack covers, blanks making up any missing letters
+def brute_force_rack_words(word_list, rack, min_length):
+    counts = collections.Counter(rack)
+    blanks = counts.pop("?", 0)
+    return [word for word in word_list if min_length <= len(word) <= len(rack) and
+            sum((collections.Counter(word) - counts).values()) <= blanks]
+
+
+def brute_force_hooks(words, word):
+    return ("".join(letter for letter in LETTERS if letter + word in words),
+            "".join(letter for letter in LETTERS if word + letter in words))
+
+
+# runs query over every input, returns the results and queries per second
+def run_queries(query, inputs):
+    start = time.perf_counter()
+    results = [query(item) for item in inputs]
+    return results, len(inputs) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    gaddag = open_dawg("lexicon/scrabble_words_complete.gaddag")
+    word_list = sorted(load_word_list())
+    words = set(word_list)
+    rng = random.Random(0)
+
+    # half real words, half real words with one letter changed
+    candidates = rng.sample(word_list, len(word_list) // 2)
+    for word in list(candidates):
+        i = rng.randrange(len(word))
+        candidates.append(word[:i] + rng.choice(LETTERS) + word[i + 1:])
+    patterns = make_patterns(rng, word_list)
+    racks = ["".join(rng.sample(TILE_BAG, 7)) for _ in range(QUERIES)]
+    hook_words = rng.sample(word_list, QUERIES * 10)
+
+    for pattern in patterns[:CHECKED]:
+        if lexicon.match(pattern) != brute_force_match(word_list, pattern):
+            raise Exception(f"match({pattern!r}) differs from a scan of the word list")
+    for rack in racks[:CHECKED]:
+        if lexicon.anagrams(rack) != brute_force_rack_words(word_list, rack, len(rack)):
+            raise Exception(f"anagrams({rack!r}) differs from a scan of the word list")
+        if lexicon.sub_anagrams(rack) != brute_force_rack_words(word_list, rack, 2):
+            raise Exception(f"sub_anagrams({rack!r}) differs from a scan of the word list")
+    for word in hook_words[:CHECKED * 10]:
+        if not lexicon.hooks(word) == lexicon.hooks(word, gaddag) == brute_force_hooks(words, word):
+            raise Exception(f"hooks({word!r}) differs from a scan of the word list")
+    if lexicon.find_all(candidates) != [word in words for word in candidates]:
+        raise Exception("find_all differs from the word list")
+    print(f"{len(word_list)} words, every query type agrees with a scan of the word list")
+
+    start = time.perf_counter()
+    lexicon.find_all(candidates)
+    batch_rate = len(candidates) / (time.perf_counter() - start)
+    _, single_rate = run_queries(lexicon.find, candidates)
+
+    # results are counted in words, or in hook letters
+    print(f"{'query':<28}{'queries/s':>14}{'results/query':>16}")
+    print(f"{'find (one word per call)':<28}{single_rate:>14.0f}{'':>16}")
+    print(f"{'find_all (words/s)':<28}{batch_rate:>14.0f}{'':>16}")
+    for name, query, inputs in (("match", lexicon.match, patterns),
+                                ("anagrams", lexicon.anagrams, racks),
+                                ("sub_anagrams", lexicon.sub_anagrams, racks),
+                                ("hooks", lambda word: "".join(lexicon.hooks(word)), hook_words),
+                                ("hooks with gaddag", lambda word: "".join(lexicon.hooks(word, gaddag)),
+                                 hook_words)):
+        results, rate = run_queries(query, inputs)
+        print(f"{name:<28}{rate:>14.0f}{sum(map(len, results)) / len(results):>16.1f}")
@@ -0,0 +1,78 @@
+# Monte Carlo simulation of the midgame positions of the fixed corpus: checks that every move passed in is
+# simulated and that every worker count ranks the candidates the same way with the same spreads, and reports
+# rollouts per second for each worker count, how many candidates were stopped early and the share of the
+# rollout budget that saved. Run from the repository root:
+#   python benchmarks/simulation.py [iterations] [worker counts...]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from board import unseen_tiles
+from leaves import open_leaves
+from positions import load_positions, set_up_board
+
+CANDIDATES = 5
+PLIES = 2
+POSITIONS = 4
+
+
+def simulate_position(lexicon, leaves, position, iterations, workers):
+    game = set_up_board(lexicon, position, workers=workers, leaves=leaves)
+    rack = list(position["rack"])
+    start = time.perf_counter()
+    results = game.simulate(rack, unseen_tiles(game, rack), candidates=CANDIDATES, plies=PLIES,
+                            iterations=iterations)
+    return results, time.perf_counter() - start
+
+
+# moves passed to simulate are all simulated, not just the first CANDIDATES of them
+def check_candidate_count(lexicon, leaves, position):
+    game = set_up_board(lexicon, position, leaves=leaves)
+    rack = list(position["rack"])
+    moves = game.top_moves(rack, 2 * CANDIDATES)
+    results = game.simulate(rack, unseen_tiles(game, rack), moves=moves, plies=PLIES, iterations=1)
+    if len(results) != len(moves):
+        raise Exception(f"simulated {len(results)} of {len(moves)} moves of {position['name']}")
+    results = game.simulate(rack, unseen_tiles(game, rack), moves=moves, candidates=3, plies=PLIES, iterations=1)
+    if len(results) != 3:
+        raise Exception(f"simulated {len(results)} of the first 3 moves of {position['name']}")
+    return len(moves)
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    worker_counts = [int(arg) for arg in sys.argv[2:]] or sorted({1, 2, os.cpu_count() or 1})
+    lexicon = open_dawg("lexicon/scrabble_words_complete.dawg")
+    leaves = open_leaves("lexicon/scrabble_words_complete.leaves")
+    positions = [position for position in load_positions() if position["kind"] == "midgame"][:POSITIONS]
+    simulated = check_candidate_count(lexicon, leaves, positions[0])
+    # start every pool before timing anything
+    for workers in worker_counts:
+        simulate_position(lexicon, leaves, positions[0], 1, workers)
+
+    print(f"{os.cpu_count()} cpus, {CANDIDATES} candidates, {PLIES} plies, up to {iterations} rollouts each")
+    print(f"{'position':<16}{'best':>10}{'spread':>9}{'stopped':>9}{'saved':>8}" +
+          "".join(f"{str(workers) + ' workers':>14}" for workers in worker_counts))
+    totals = {workers: [0, 0.0] for workers in worker_counts}
+    for position in positions:
+        runs = {workers: simulate_position(lexicon, leaves, position, iterations, workers)
+                for workers in worker_counts}
+        results = runs[worker_counts[0]][0]
+        for workers in worker_counts:
+            if runs[workers][0] != results:
+                raise Exception(f"{workers} workers simulated {position['name']} differently")
+        rollouts = sum(result["rollouts"] for result in results)
+        stopped = sum(result["stopped"] for result in results)
+        line = f"{position['name']:<16}{results[0]['move'][2]:>10}{results[0]['spread']:>9.1f}{stopped:>9}" + \
+               f"{1 - rollouts / (len(results) * iterations):>8.0%}"
+        for workers in worker_counts:
+            seconds = runs[workers][1]
+            totals[workers][0] += rollouts
+            totals[workers][1] += seconds
+            line += f"{rollouts / seconds:>8.1f} r/s  "
+        print(line)
+    print(f"{'total':<52}" + "".join(f"{rollouts / seconds:>8.1f} r/s  " for rollouts, seconds in totals.values()))
+    print(f"every worker count simulated the same spreads, all {simulated} moves passed in were simulated")
@@ -0,0 +1,162 @@
+# Load generator for the solver service: clients threads, each with its own connection, send the positions
+# of the fixed corpus round and round as fast as they are answered, and it reports throughput, latency
+# percentiles as the clients saw them and the server's own metrics. Unless --socket or --port name a running
+# server, one is started on a temporary Unix socket with --workers workers and stopped at the end. Its move
+# cache is off unless --cache-size is given, the corpus is small and would soon be answered from the cache
+# alone. For comparison it also times one-off runs that solve each position in a process of its own, the way
+# every tool without the server does. Run from the repository root:
+#   python benchmarks/solver_load.py [--clients N] [--requests N] [--workers N] [--moves N] [--deadline S]
+#                                    [--cache-size N] [--socket PATH | --port PORT]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from positions import load_positions
+from server import percentile
+from solver_client import SolverClient
+
+# seconds to wait for a started server to take connections
+STARTUP_TIMEOUT = 120
+
+# a process solving one position given as JSON on its command line
+ONE_OFF_SCRIPT = """
+import json, sys
+from dawg import *
+from board import ScrabbleBoard, place_rows
+position = json.loads(sys.argv[1])
+board = ScrabbleBoard(open_dawg("lexicon/scrabble_words_complete.dawg"))
+place_rows(board, position["rows"])
+board.top_moves(list(position["rack"]), 10)
+"""
+
+
+# seconds to start a process for each position in turn and solve it there
+def time_one_off(positions):
+    start = time.perf_counter()
+    for position in positions:
+        subprocess.run([sys.executable, "-c", ONE_OFF_SCRIPT, json.dumps(position)], check=True)
+    return time.perf_counter() - start
+
+
+# start server.py on socket_path and wait until it answers
+def start_server(socket_path, workers, cache_size):
+    server = subprocess.Popen([sys.executable, "server.py", "--socket", socket_path, "--workers", str(workers),
+                               "--cache-size", str(cache_size)], stdout=subprocess.DEVNULL)
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while True:
+        try:
+            with SolverClient(socket_path=socket_path) as client:
+                client.metrics()
+            return server
+        except OSError:
+            if server.poll() is not None or time.perf_counter() > deadline:
+                server.kill()
+                raise Exception("solver server didn't start")
+            time.sleep(0.1)
+
+
+# requests the server has to turn away, with the error each one gets. JSON true and false would pass for 1 and 0
+# with a plain isinstance(value, int)
+INVALID_REQUESTS = [({"moves": True}, "moves must be a positive number of moves or null"),
+                    ({"moves": False}, "moves must be a positive number of moves or null"),
+                    ({"bag": True}, "bag must be the number of tiles left to draw"),
+                    ({"bag": False}, "bag must be the number of tiles left to draw")]
+
+
+# send each of INVALID_REQUESTS with a position from the corpus and check that it gets its error
+def check_invalid_requests(connect, position):
+    with SolverClient(**connect) as client:
+        for fields, expected in INVALID_REQUESTS:
+            try:
+                client.request({"rows": position["rows"], "rack": position["rack"], **fields})
+            except Exception as e:
+                if str(e) != expected:
+                    raise Exception(f"{fields} got {e!r} instead of {expected!r}")
+                continue
+            raise Exception(f"{fields} was served")
+
+
+# send requests positions from the corpus, starting at offset, and record the latency of each response or
+# the error it got
+def run_client(connect, positions, offset, requests, moves, deadline, latencies, errors):
+    with SolverClient(**connect) as client:
+        for i in range(requests):
+            position = positions[(offset + i) % len(positions)]
+            start = time.perf_counter()
+            try:
+                client.solve(position["rows"], position["rack"], moves, deadline=deadline)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the throughput of the solver service")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--moves", type=int, default=10)
+    parser.add_argument("--deadline", type=float, default=None)
+    parser.add_argument("--cache-size", type=int, default=0)
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    positions = load_positions()
+    one_off_seconds = time_one_off(positions)
+
+    server = None
+    if args.port is not None:
+        connect = {"port": args.port}
+    elif args.socket is not None:
+        connect = {"socket_path": args.socket}
+    else:
+        socket_path = os.path.join(tempfile.mkdtemp(), "solver.sock")
+        server = start_server(socket_path, args.workers, args.cache_size)
+        connect = {"socket_path": socket_path}
+
+    try:
+        check_invalid_requests(connect, positions[0])
+        latencies = []
+        errors = []
+        threads = [threading.Thread(target=run_client, args=(connect, positions, client, args.requests, args.moves,
+                                                             args.deadline, latencies, errors))
+                   for client in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        with SolverClient(**connect) as client:
+            metrics = client.metrics()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{metrics['workers']} workers, {args.clients} clients, {args.clients * args.requests} requests over "
+          f"{len(positions)} positions")
+    print(f"{len(latencies)} answered and {len(errors)} errors in {seconds:.2f}s, "
+          f"{len(latencies) / seconds:.1f} requests/s")
+    print(f"{'milliseconds':<16}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    rows = [("client latency", [percentile(latencies, fraction) for fraction in (0.5, 0.9, 0.99, 1.0)])] + \
+           [(f"server {name}", [metrics[f"{name}_{label}"] for label in ("p50", "p90", "p99", "max")])
+            for name in ("latency", "wait", "search")]
+    for name, values in rows:
+        print(f"{name:<16}" + "".join(f"{1000 * (value or 0):>8.1f}" for value in values))
+    print(f"server queue: {metrics['max_queued']} requests waiting at most, {metrics['expired']} expired, "
+          f"{metrics['rejected']} turned away")
+    print(f"one-off runs, a process per position: {len(positions) / one_off_seconds:.1f} requests/s, "
+          f"{1000 * one_off_seconds / len(positions):.0f} ms each")
+    print(f"{len(INVALID_REQUESTS)} invalid requests turned away with the right errors")
+    for error in sorted(set(errors)):
+        print(f"error: {error} ({errors.count(error)}x)")
@@ -0,0 +1,201 @@
+# Benchmark suite for the solver's hot paths. Measures over the fixed position corpus:
+#   - get_start_move / get_best_move latency percentiles per position kind
+#   - lexicon load time (memory-mapped and pickled) and DAWG build time
+#   - find_in_dawg and find_all_in_dawg throughput on a fixed mix of words and non-words
+#   - peak memory of move generation over the corpus
+# and writes the results as JSON. If a baseline file exists the results are compared against it and every
+# metric that got worse by more than the threshold is flagged as a regression (exit status 1).
+# Run from the repository root:
+#   python benchmarks/suite.py [--engine dawg|gaddag] [--output PATH] [--baseline PATH] [--save-baseline]
+#                              [--threshold FRACTION] [--skip-build]
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from dawg import *
+from positions import load_positions, set_up_board, play_position
+from dawg_build import load_word_list
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DAWG_PATH = "lexicon/scrabble_words_complete.dawg"
+GADDAG_PATH = "lexicon/scrabble_words_complete.gaddag"
+PICKLE_PATH = "lexicon/scrabble_words_complete.pickle"
+LATENCY_RUNS = 10
+LOAD_RUNS = 5
+MMAP_LOADS = 1000
+LOOKUP_WORDS = 20000
+LOOKUP_RUNS = 5
+
+
+# nearest-rank percentile of a sorted list
+def percentile(values, q):
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+# get_start_move latency for openings and get_best_move latency for the other kinds, every position timed
+# LATENCY_RUNS times on a fresh board
+def move_latencies(lexicon, gaddag, engine):
+    samples = {}
+    for position in load_positions():
+        kind = position["kind"]
+        for _ in range(LATENCY_RUNS):
+            game = set_up_board(lexicon, position, engine=engine, gaddag_root=gaddag)
+            start = time.perf_counter()
+            play_position(game, position)
+            samples.setdefault(kind, []).append(time.perf_counter() - start)
+
+    metrics = {}
+    for kind, times in samples.items():
+        times.sort()
+        name = "get_start_move" if kind == "opening" else f"get_best_move.{kind}"
+        for q in (50, 90, 99):
+            metrics[f"{name}.p{q}_ms"] = percentile(times, q) * 1000
+        metrics[f"{name}.max_ms"] = times[-1] * 1000
+    return metrics
+
+
+def best_time(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# mapping the lexicon takes microseconds, so it is timed over a batch of MMAP_LOADS loads
+def load_times():
+    def map_lexicon():
+        for _ in range(MMAP_LOADS):
+            open_dawg(DAWG_PATH).find("QUIXOTIC")
+
+    metrics = {"load.mmap_ms": best_time(map_lexicon, LOAD_RUNS) / MMAP_LOADS * 1000}
+    if os.path.exists(PICKLE_PATH):
+        metrics["load.pickle_ms"] = best_time(lambda: load_pickle(PICKLE_PATH), LOAD_RUNS) * 1000
+    return metrics
+
+
+def build_time(word_list):
+    # build_dawg prints its node count
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {"build.dawg_s": best_time(lambda: build_dawg(word_list, minimize_linear), 1)}
+
+
+# lookups per second of find_in_dawg, one word at a time and as one batch, over words from the lexicon and
+# the same words with one letter changed, which are mostly not words and fail at different depths
+def lookup_throughput(lexicon, word_list):
+    rng = random.Random(0)
+    words = rng.sample(word_list, LOOKUP_WORDS // 2)
+    for word in list(words):
+        i = rng.randrange(len(word))
+        words.append(word[:i] + rng.choice(LETTERS) + word[i + 1:])
+
+    def look_up_all():
+        for word in words:
+            find_in_dawg(word, lexicon)
+
+    return {"find_in_dawg.lookups_per_s": len(words) / best_time(look_up_all, LOOKUP_RUNS),
+            "find_all_in_dawg.lookups_per_s":
+                len(words) / best_time(lambda: find_all_in_dawg(words, lexicon), LOOKUP_RUNS)}
+
+
+# most Python heap allocated by move generation for any one corpus position on top of its board, and the
+# process's peak resident set
+def peak_memory(lexicon, gaddag, engine):
+    peak = 0
+    for position in load_positions():
+        game = set_up_board(lexicon, position, engine=engine, gaddag_root=gaddag)
+        gc.collect()
+        tracemalloc.start()
+        play_position(game, position)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    return {"memory.move_generation_peak_mib": peak / 2 ** 20, "memory.max_rss_mib": max_rss / 2 ** 20}
+
+
+def run_suite(engine, skip_build):
+    lexicon = open_dawg(DAWG_PATH)
+    gaddag = open_dawg(GADDAG_PATH) if engine == "gaddag" else None
+    word_list = load_word_list()
+    metrics = {}
+    metrics.update(move_latencies(lexicon, gaddag, engine))
+    metrics.update(load_times())
+    metrics.update(lookup_throughput(lexicon, word_list))
+    if not skip_build:
+        metrics.update(build_time(word_list))
+    metrics.update(peak_memory(lexicon, gaddag, engine))
+    return {
+        "engine": engine,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metrics": metrics,
+    }
+
+
+# metrics that got worse than the baseline by more than threshold, as (name, baseline, current, change).
+# throughputs are better higher, everything else is better lower
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for name, current in results["metrics"].items():
+        previous = baseline["metrics"].get(name)
+        if not previous:
+            continue
+        change = (current - previous) / previous
+        if name.endswith("_per_s"):
+            change = -change
+        if change > threshold:
+            regressions.append((name, previous, current, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the solver benchmark suite")
+    parser.add_argument("--engine", choices=("dawg", "gaddag"), default="dawg")
+    parser.add_argument("--output", default=os.path.join(BENCHMARK_DIR, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCHMARK_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="also write the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fraction a metric may get worse by before it is flagged, default 0.25")
+    parser.add_argument("--skip-build", action="store_true", help="skip the DAWG build benchmark")
+    args = parser.parse_args()
+
+    results = run_suite(args.engine, args.skip_build)
+    for name, value in results["metrics"].items():
+        print(f"{name:<40}{value:>14.2f}")
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline["engine"] != results["engine"]:
+            raise Exception(f"Baseline was run with the {baseline['engine']} engine, not {results['engine']}")
+        regressions = find_regressions(results, baseline, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"REGRESSION {name}: {previous:.2f} -> {current:.2f} ({change * 100:+.0f}% worse)")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (threshold {args.threshold * 100:.0f}%)")
+    else:
+        print(f"no baseline at {args.baseline}, run with --save-baseline to create one")
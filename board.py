@@ -1,90 +1,254 @@
 from dawg import *
-import regex as re
+from leaves import MAX_LEAVE, leave_codes
+from endgame import solve_endgame
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import heapq
+import itertools
+import math
+import pickle
 import random
-import copy
-
-
-class Square:
-    # default behavior is blank square, no score modifier, all cross-checks valid
-    def __init__(self, letter=None, modifier="Normal", sentinel=1):
-        self.letter = letter
-        self.modifier = modifier
-        self.visible = True
-        if sentinel == 0:
-            self.visible = False
-
-    def __str__(self):
-        if not self.visible:
-            return ""
-        if not self.letter:
-            return "_"
+import statistics
+import time
+
+import numpy as np
+
+
+# cross-check bitmask with the bit for every letter code set
+ALL_LETTERS_MASK = (1 << len(LETTERS)) - 1
+
+# move generation keeps the rack as a list of tile counts indexed by letter code, with blanks counted last
+BLANK_CODE = len(LETTERS)
+
+
+# the tiles that can play each letter code: its own tile, or a blank standing in for it (marked with a
+# "%" after the letter in generated words)
+TILE_CHOICES = [((code, letter), (BLANK_CODE, letter + "%")) for code, letter in enumerate(LETTERS)]
+
+
+# letter and word multipliers of the premium square modifiers
+LETTER_MULTIPLIERS = {"2LS": 2, "3LS": 3}
+WORD_MULTIPLIERS = {"2WS": 2, "3WS": 3}
+
+
+# split a word into (letter, is_blank) pairs, blanks are marked by a "%" after their letter
+def word_tiles(word):
+    tiles = []
+    for letter in word:
+        if letter == "%":
+            tiles[-1] = (tiles[-1][0], True)
         else:
-            return self.letter
+            tiles.append((letter, False))
+    return tiles
+
+
+# convert a rack given as a list of letters into tile counts
+def rack_to_counts(rack):
+    counts = [0] * (BLANK_CODE + 1)
+    for letter in rack:
+        if letter == "%":
+            counts[BLANK_CODE] += 1
+        else:
+            counts[LETTER_CODES[letter]] += 1
+    return counts
+
+
+# worker pools for parallel move generation, one per worker count and pair of lexicons. the lexicons are
+# handed to each worker once when it starts and kept alive here so their ids aren't reused
+_move_pools = {}
+_search_ids = itertools.count()
+
+
+def _move_pool(workers, dawg, gaddag):
+    key = (workers, id(dawg), id(gaddag))
+    if key not in _move_pools:
+        pool = ProcessPoolExecutor(workers, initializer=_init_move_worker, initargs=(dawg, gaddag))
+        _move_pools[key] = (pool, dawg, gaddag)
+    return _move_pools[key][0]
+
+
+# lexicons of this worker process, and the search id and board of the position it is working on
+_worker_lexicons = None
+_worker_search = (None, None)
+
+
+def _init_move_worker(dawg, gaddag):
+    global _worker_lexicons
+    _worker_lexicons = (dawg, gaddag)
+
+
+# the pickled board of a search, in a worker process. it is only unpickled for the first task of each
+# search, later tasks of the same search reuse it
+def _worker_board(search_id, state):
+    global _worker_search
+    if _worker_search[0] != search_id:
+        board = pickle.loads(state)
+        board.dawg, board.gaddag = _worker_lexicons
+        board.workers = 1
+        board.cache_size = 0
+        if board.stats:
+            board._instrument()
+        _worker_search = (search_id, board)
+    return _worker_search[1]
+
+
+# top_moves over the anchors of some lines of a pickled board, in a worker process
+def _search_lines(search_id, state, word_rack, lines, k, key):
+    board = _worker_board(search_id, state)
+    board.anchors = [set(), set()]
+    for (orientation, _), anchors in lines:
+        board.anchors[orientation].update(anchors)
+    board.prune_stats = dict.fromkeys(board.prune_stats, 0)
+    for name in board.counters:
+        board.counters[name] = 0
+    return board.top_moves(word_rack, k, key), board.prune_stats, board.counters
+
+
+# spreads of simulation rollouts of one move on a pickled board, one per seed, in a worker process
+def _simulate_rollouts(search_id, state, move, word_rack, unseen, plies, seeds):
+    board = _worker_board(search_id, state)
+    return [board._rollout(move, word_rack, unseen, plies, seed) for seed in seeds]
+
+
+# random 64-bit keys for the zobrist hash: one per square and tile (a letter, or a blank playing it), fixed
+# so a position hashes the same in every process
+_zobrist_random = random.Random(0x5C4AB)
+ZOBRIST_KEYS = [[[_zobrist_random.getrandbits(64) for _ in range(2 * len(LETTERS))] for _ in range(15)]
+                for _ in range(15)]
+
+
+def zobrist_key(row, col, letter, blank):
+    return ZOBRIST_KEYS[row][col][LETTER_CODES[letter] + (len(LETTERS) if blank else 0)]
+
+
+# words already played are part of the position too, moves that repeat one are skipped
+def zobrist_word_key(word):
+    return int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+
+
+# ranking key of equity mode: a move's score plus the value of the tiles it leaves on word_rack, from a
+# leaves.LeaveTable. leaves are looked up once per set of tiles played. keys compare by table and rack, so
+# the move cache recognizes them, and pickle with the table's path for worker processes
+class EquityKey:
+    def __init__(self, leaves, word_rack):
+        self.leaves = leaves
+        self.rack_codes = leave_codes(word_rack)
+        self.leave_values = {}
+
+    def __call__(self, move):
+        rack_tiles = "".join(sorted(move[5]))
+        value = self.leave_values.get(rack_tiles)
+        if value is None:
+            codes = list(self.rack_codes)
+            for code in leave_codes(rack_tiles):
+                codes.remove(code)
+            value = self.leave_values[rack_tiles] = self.leaves.value_of_codes(codes)
+        return move[3] + value
+
+    def __eq__(self, other):
+        return isinstance(other, EquityKey) and (self.leaves, self.rack_codes) == (other.leaves, other.rack_codes)
+
+    def __hash__(self):
+        return hash((id(self.leaves), tuple(self.rack_codes)))
+
+
+# most cross-check masks a board (and its clones) remembers before starting over
+CROSS_CHECK_MASKS_SIZE = 100000
+
+# simulation stops giving a candidate rollouts once the leader's spread beats its spread by more than this
+# many standard errors of their difference, after at least MIN_ROLLOUTS rollouts each
+STOP_DEVIATIONS = 2.0
+# candidates simulated if none are given
+SIMULATION_CANDIDATES = 5
+MIN_ROLLOUTS = 12
+
+
+# per-turn counters and phase times kept by boards with stats on, and the methods they wrap to keep them
+TURN_COUNTERS = ("anchors", "edges", "cross_checks", "candidates", "moves",
+                 "generate_s", "score_s", "play_s", "cross_checks_s")
+INSTRUMENTED_METHODS = ("_left_part", "_extend_right", "_gaddag_left", "_gaddag_right", "get_all_words",
+                        "_cross_check_mask", "_score_word", "top_moves", "insert_word", "_update_cross_checks",
+                        "get_start_move", "get_best_move")
+
+
+# the board arrays are 16x16: row 15 and column 15 are a sentinel border after the last square, which
+# index -1 wraps around to as well
+BOARD_SIZE = 16
+
+# premium squares: D and T double and triple the word, d and t double and triple the letter
+PREMIUM_ROWS = ["T..d...T...d..T",
+                ".D...t...t...D.",
+                "..D...d.d...D..",
+                "d..D...d...D..d",
+                "....D.....D....",
+                ".t...t...t...t.",
+                "..d...d.d...d..",
+                "T..d...D...d..T",
+                "..d...d.d...d..",
+                ".t...t...t...t.",
+                "....D.....D....",
+                "d..D...d...D..d",
+                "..D...d.d...D..",
+                ".D...t...t...D.",
+                "T..d...T...d..T"]
+PREMIUM_MODIFIERS = {"D": "2WS", "T": "3WS", "d": "2LS", "t": "3LS"}
+
+# a board is one uint8 buffer holding, in order: the cross-check masks (uint32) and cross-word scores
+# (int16, -1 where a tile wouldn't form a cross-word) of both orientations, then the square layers below
+CROSS_CHECKS_BYTES = 2 * BOARD_SIZE * BOARD_SIZE * 4
+SQUARES_OFFSET = CROSS_CHECKS_BYTES + 2 * BOARD_SIZE * BOARD_SIZE * 2
+# square layers: letter code + 1 of the tile on the square (0 if empty), 1 if that tile is a blank, letter and
+# word multipliers (1 once the square is covered), 1 if there is a tile, 1 on the sentinel border
+SQUARE_LAYERS = 6
+BOARD_STATE_BYTES = SQUARES_OFFSET + SQUARE_LAYERS * BOARD_SIZE * BOARD_SIZE
+
+# letter of each value of the letter layer
+LETTER_OF_CODE = [""] + list(LETTERS)
+
+
+# views of the typed arrays in a board state buffer, named as the board attributes they are bound to
+STATE_ARRAYS = ("cross_checks", "cross_scores", "letters", "blanks", "letter_multipliers", "word_multipliers",
+                "occupied", "sentinels")
+
+
+def state_arrays(state):
+    cross_checks = state[:CROSS_CHECKS_BYTES].view(np.uint32).reshape(2, BOARD_SIZE, BOARD_SIZE)
+    cross_scores = state[CROSS_CHECKS_BYTES:SQUARES_OFFSET].view(np.int16).reshape(2, BOARD_SIZE, BOARD_SIZE)
+    return (cross_checks, cross_scores, *state[SQUARES_OFFSET:].reshape(SQUARE_LAYERS, BOARD_SIZE, BOARD_SIZE))
+
+
+# state of the empty board, copied by every new board
+def empty_board_state():
+    state = np.zeros(BOARD_STATE_BYTES, np.uint8)
+    cross_checks, cross_scores, _, _, letter_multipliers, word_multipliers, _, sentinels = state_arrays(state)
+    cross_checks[:] = ALL_LETTERS_MASK
+    cross_scores[:] = -1
+    letter_multipliers[:] = 1
+    word_multipliers[:] = 1
+    for row, line in enumerate(PREMIUM_ROWS):
+        for col, premium in enumerate(line):
+            modifier = PREMIUM_MODIFIERS.get(premium)
+            letter_multipliers[row, col] = LETTER_MULTIPLIERS.get(modifier, 1)
+            word_multipliers[row, col] = WORD_MULTIPLIERS.get(modifier, 1)
+    sentinels[15, :] = 1
+    sentinels[:, 15] = 1
+    return state
+
+
+EMPTY_BOARD_STATE = empty_board_state()
+# premiums of the empty board, restored when a tile is taken off a square
+PREMIUM_LETTER_MULTIPLIERS, PREMIUM_WORD_MULTIPLIERS = state_arrays(EMPTY_BOARD_STATE)[4:6]
 
 
 class ScrabbleBoard:
-    def __init__(self, dawg_root):
-
-        row_1 = \
-            [Square(modifier="3WS"), Square(), Square(), Square(modifier="2LS"), Square(),
-             Square(), Square(), Square(modifier="3WS"), Square(), Square(),
-             Square(), Square(modifier="2LS"), Square(), Square(), Square(modifier="3WS"),
-             Square(sentinel=0)]
-        row_15 = copy.deepcopy(row_1)
-
-        row_2 = \
-            [Square(), Square(modifier="2WS"), Square(), Square(), Square(),
-             Square(modifier="3LS"), Square(), Square(), Square(), Square(modifier="3LS"),
-             Square(), Square(), Square(), Square(modifier="2WS"), Square(),
-             Square(sentinel=0)]
-        row_14 = copy.deepcopy(row_2)
-
-        row_3 = \
-            [Square(), Square(), Square(modifier="2WS"), Square(), Square(),
-             Square(), Square(modifier="2LS"), Square(), Square(modifier="2LS"), Square(),
-             Square(), Square(), Square(modifier="2WS"), Square(), Square(),
-             Square(sentinel=0)]
-        row_13 = copy.deepcopy(row_3)
-
-        row_4 = \
-            [Square(modifier="2LS"), Square(), Square(), Square(modifier="2WS"), Square(),
-             Square(), Square(), Square(modifier="2LS"), Square(), Square(),
-             Square(), Square(modifier="2WS"), Square(), Square(), Square(modifier="2LS"),
-             Square(sentinel=0)]
-        row_12 = copy.deepcopy(row_4)
-
-        row_5 = \
-            [Square(), Square(), Square(), Square(), Square(modifier="2WS"),
-             Square(), Square(), Square(), Square(), Square(),
-             Square(modifier="2WS"), Square(), Square(), Square(), Square(),
-             Square(sentinel=0)]
-        row_11 = copy.deepcopy(row_5)
-
-        row_6 = \
-            [Square(), Square(modifier="3LS"), Square(), Square(), Square(),
-             Square(modifier="3LS"), Square(), Square(), Square(), Square(modifier="3LS"),
-             Square(), Square(), Square(), Square(modifier="3LS"), Square(),
-             Square(sentinel=0)]
-        row_10 = copy.deepcopy(row_6)
-
-        row_7 = \
-            [Square(), Square(), Square(modifier="2LS"), Square(), Square(),
-             Square(), Square(modifier="2LS"), Square(), Square(modifier="2LS"), Square(),
-             Square(), Square(), Square(modifier="2LS"), Square(), Square(),
-             Square(sentinel=0)]
-        row_9 = copy.deepcopy(row_7)
-
-        row_8 = \
-            [Square(modifier="3WS"), Square(), Square(), Square(modifier="2LS"), Square(),
-             Square(), Square(), Square(modifier="2WS"), Square(), Square(),
-             Square(), Square(modifier="2LS"), Square(), Square(), Square(modifier="3WS"),
-             Square(sentinel=0)]
-
-        row_16 = [Square(sentinel=0) for _ in range(16)]
-
-        # variables to describe board state
-        self.board = [row_1, row_2, row_3, row_4, row_5, row_6, row_7, row_8,
-                      row_9, row_10, row_11, row_12, row_13, row_14, row_15, row_16]
+    def __init__(self, dawg_root, engine="dawg", gaddag_root=None, prune=False, workers=1, stats=False,
+                 cache_size=0, alphagrams=None, leaves=None):
+
+        # variables to describe board state. everything about the squares lives in one numpy buffer, see
+        # _bind_state for the arrays it is split into
+        self.state = EMPTY_BOARD_STATE.copy()
+        self._bind_state()
 
         self.point_dict = {"A": 1, "B": 3, "C": 3, "D": 2,
                            "E": 1, "F": 4, "G": 2, "H": 4,
@@ -96,222 +260,702 @@ class ScrabbleBoard:
 
         self.words_on_board = []
 
-        self.is_transpose = False
+        # moves kept by the last get_best_move or get_start_move, best first
+        self.all_moves = []
+        # moves found for the anchor being searched, waiting to be handed out by iter_moves
+        self.found_moves = []
+        # moves scoring less than this are dropped as soon as they are scored
+        self.min_score = 0
+
+        # with prune set to "anchors", anchors whose score upper bound is below min_score aren't searched,
+        # "branches" also bounds every left part that reaches the anchor tile. this never changes which
+        # moves are kept, it only skips moves that would be dropped anyway
+        if prune not in (False, "anchors", "branches"):
+            raise Exception(f"Unknown pruning level {prune}")
+        self.prune = prune
+        self.prune_branches = prune == "branches"
+        self.prune_stats = {"anchors": 0, "anchors_pruned": 0, "branches": 0, "branches_pruned": 0}
+        # tile count and descending tile scores of the rack being searched, used by the bounds
+        self.rack_size = 0
+        self.rack_scores = []
+        # _rest_bound results for the rack being searched
+        self.rest_bounds = {}
+
+        # filled squares that words can be built from: tiles whose left neighbor is empty, for words played
+        # across (index 0, as (row, col)) and down (index 1, as (col, row), i.e. in transposed coordinates).
+        # kept up to date by insert_word so move generation never has to scan the whole board
+        self.anchors = [set(), set()]
+        # (across, down) anchor counts for each call to get_best_move
+        self.anchor_counts = []
 
         # variables to encode best word on a given turn
         self.dawg_root = dawg_root
+        # move generation walks the array-backed dawg, pack the Node graph if that is what we were given
+        if isinstance(dawg_root, CompactDawg):
+            self.dawg = dawg_root
+        else:
+            self.dawg = CompactDawg.from_node(dawg_root)
+        # move generation engine. "dawg" builds left parts and extends them right through the anchor tile,
+        # "gaddag" works outwards from the anchor tile in both directions and needs gaddag_root. both find
+        # the same moves, the dawg is still used for cross-checks
+        if engine not in ("dawg", "gaddag"):
+            raise Exception(f"Unknown move generation engine {engine}")
+        if engine == "gaddag" and gaddag_root is None:
+            raise Exception("The gaddag engine needs a gaddag_root")
+        self.engine = engine
+        if gaddag_root is None or isinstance(gaddag_root, CompactDawg):
+            self.gaddag = gaddag_root
+        else:
+            self.gaddag = CompactDawg.from_node(gaddag_root)
+        # alphagram index of the same words (alphagrams.open_alphagrams). if given, opening moves come from
+        # index lookups of the rack instead of a search of the lexicon
+        self.alphagrams = alphagrams
+        # leave table (leaves.open_leaves). if given, get_best_move and get_start_move play the move with the
+        # highest equity, its score plus the value of the tiles it keeps, instead of the highest score
+        self.leaves = leaves
+        # tiles left in the bag, set by whoever deals the racks. leaves are only worth something while there
+        # are tiles to draw, with an empty bag moves are ranked by score. None if not known
+        self.tiles_in_bag = None
+        # results of the last simulate, best first, see there
+        self.simulation = []
+        # result of the last get_endgame_move, see endgame.solve_endgame
+        self.endgame = None
+        # with more than one worker, top_moves hands the anchors out to a pool of that many processes
+        # (shared with every other board on the same lexicons) and merges what they find. the moves are
+        # the same as a search in this process
+        if workers < 1:
+            raise Exception(f"Need at least one worker, got {workers}")
+        self.workers = workers
         self.word_rack = []
         self.word_score_dict = {}
         self.best_word = ""
         self.highest_score = 0
-        self.dist_from_anchor = 0
         self.letters_from_rack = []
+        # board squares of the tiles placed by the last insert_word and the orientation it was played in
+        self.placed_squares = []
+        self.placed_orientation = 0
 
-        # rows and columns of highest-scoring word found so far.
-        # these are the rows and columns of the tile already on the board
+        # board row and column of the first square of the best move
         self.best_row = 0
         self.best_col = 0
-
-
-    # transpose method that modifies self.board inplace
-    def _transpose(self):
-        # https://datagy.io/python-transpose-list-of-lists/
-        transposed_tuples = copy.deepcopy(list(zip(*self.board)))
-        self.board = [list(sublist) for sublist in transposed_tuples]
-        self.is_transpose = not self.is_transpose
-
-    def vertical_check_letter(self, row, col, letter):
-        word = letter
-        r = row - 1
-        while self.board[r][col].letter:
-            word=self.board[r][col].letter+word
-            r-=1
-        r=row+1
-        while self.board[r][col].letter:
-            word=word+self.board[r][col].letter
-            r+=1
-        return len(word) == 1 or find_in_dawg(word, self.dawg_root)
-
-    def vertical_check(self, row, col, word):
-        if word=="IBEX" and row==8 and col==5:
-            verbose=True
-            print("CHECKING IBEX")
+        self.best_orientation = 0
+
+        # orientation, line and anchor tile that move generation is currently working from. on the opening
+        # move processing_col is the column right of the center square
+        self.processing_orientation = 0
+        self.processing_row = 0
+        self.processing_col = 0
+
+        # zobrist hash of the tiles on the board and the words played so far, which is everything the moves
+        # found for a rack depend on. insert_word keeps it up to date
+        self.zobrist_hash = 0
+        # with cache_size set, top_moves remembers the results of that many (position, rack, k, key) queries,
+        # least recently used first out. cached moves are stored as tuples and copied on the way out, so
+        # nothing a caller does to a result can change the cache
+        self.cache_size = cache_size
+        self.move_cache = OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0}
+        # cross-check masks by (prefix, suffix), shared with clones. search plays and takes back the same
+        # moves over and over, and the words they meet across keep coming back
+        self.cross_check_masks = {}
+
+        # with stats on, every get_start_move and get_best_move appends a dict of counters and phase times
+        # to turn_stats (see _instrument). boards without stats run the plain methods
+        self.stats = stats
+        self.turn_stats = []
+        self.counters = {}
+        if stats:
+            self._instrument()
+
+    # boards are pickled to hand a position to move generation workers, which have their own lexicons.
+    # the stats wrappers are closures over this board, workers put their own in place
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["dawg_root"] = state["dawg"] = state["gaddag"] = state["alphagrams"] = None
+        state["move_cache"] = OrderedDict()
+        state["cross_check_masks"] = {}
+        for name in INSTRUMENTED_METHODS + STATE_ARRAYS:
+            state.pop(name, None)
+        return state
+
+    # the typed arrays are views of the state buffer, bind them again rather than pickling copies
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind_state()
+
+    # shadow the hot methods of this board (not of the class) with wrappers that count calls into counters
+    # and time phases. per turn: anchors searched, traversal steps (one per edge followed by the move
+    # generator), cross-check masks computed, candidate words scored and moves kept by the scorer, and
+    # seconds spent generating moves, in the scorer, playing the best move and updating cross-checks
+    def _instrument(self):
+        counters = self.counters = dict.fromkeys(TURN_COUNTERS, 0)
+
+        def count(method, name):
+            def counted(*args):
+                counters[name] += 1
+                return method(*args)
+            return counted
+
+        def timed(method, name):
+            def timer(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    counters[name] += time.perf_counter() - start
+            return timer
+
+        def score_word(word, start_col):
+            counters["candidates"] += 1
+            found = len(self.found_moves)
+            start = time.perf_counter()
+            score_word_method(word, start_col)
+            counters["score_s"] += time.perf_counter() - start
+            counters["moves"] += len(self.found_moves) - found
+
+        def turn(method):
+            def play_turn(word_rack, *args, **kwargs):
+                for name in counters:
+                    counters[name] = 0
+                rack = "".join(word_rack)
+                start = time.perf_counter()
+                result = method(word_rack, *args, **kwargs)
+                self.turn_stats.append({"turn": len(self.turn_stats), "rack": rack, "word": self.best_word,
+                                        "score": self.highest_score, **counters,
+                                        "total_s": time.perf_counter() - start})
+                return result
+            return play_turn
+
+        for name in ("_left_part", "_extend_right", "_gaddag_left", "_gaddag_right"):
+            setattr(self, name, count(getattr(self, name), "edges"))
+        self.get_all_words = count(self.get_all_words, "anchors")
+        self._cross_check_mask = count(self._cross_check_mask, "cross_checks")
+        score_word_method = self._score_word
+        self._score_word = score_word
+        self.top_moves = timed(self.top_moves, "generate_s")
+        self.insert_word = timed(self.insert_word, "play_s")
+        self._update_cross_checks = timed(self._update_cross_checks, "cross_checks_s")
+        self.get_start_move = turn(self.get_start_move)
+        self.get_best_move = turn(self.get_best_move)
+
+    # bitmask of letters that make prefix + letter + suffix a word, all letters if there is nothing to join
+    def _cross_check_mask(self, prefix, suffix):
+        if not prefix and not suffix:
+            return ALL_LETTERS_MASK
+        mask = self.cross_check_masks.get((prefix, suffix))
+        if mask is not None:
+            return mask
+        mask = 0
+        node = self.dawg.root
+        for letter in prefix:
+            node = self.dawg.child(node, letter)
+            if node is None:
+                break
         else:
-            verbose=False
-        # make sure no letters before or after word
-        if not self.board[row][col-1].modifier or not self.board[row][col+len(word)].modifier:
-            return False
-
-        for i in range(len(word)):
-            if verbose:
-                print("LETTER: "+word[i])
-            if self.board[row][col+i].modifier:
-                if verbose:
-                    print("MODIFIER NOT EMPTY")
-                if not self.vertical_check_letter(row, col+i, word[i]):
-                    return False
+            for code, child in self.dawg.edges(node):
+                for letter in suffix:
+                    child = self.dawg.child(child, letter)
+                    if child is None:
+                        break
+                else:
+                    if self.dawg.is_terminal(child):
+                        mask |= 1 << code
+        if len(self.cross_check_masks) >= CROSS_CHECK_MASKS_SIZE:
+            self.cross_check_masks.clear()
+        self.cross_check_masks[prefix, suffix] = mask
+        return mask
+
+    # point the names of the typed arrays at the state buffer. squares are indexed [row, col] on the board,
+    # cross_checks and cross_scores [orientation, row, col]. masks and scores are indexed by the orientation of
+    # the word being played: index 0 is used by words played across (checks the tiles above and below), index
+    # 1 by words played down
+    def _bind_state(self):
+        (self.cross_checks, self.cross_scores, self.letters, self.blanks, self.letter_multipliers,
+         self.word_multipliers, self.occupied, self.sentinels) = state_arrays(self.state)
+        # the (orientation, row) line copied out by _load_line, None after any change to the board
+        self.loaded_line = None
+
+    # a copy of this board to play on, e.g. to try out a move: the squares are one buffer copy. the copy
+    # shares the lexicons and the move cache, which is keyed by position
+    def clone(self):
+        board = object.__new__(type(self))
+        board.__dict__.update(self.__dict__)
+        for name in INSTRUMENTED_METHODS:
+            board.__dict__.pop(name, None)
+        board.state = self.state.copy()
+        board._bind_state()
+        board.anchors = [set(self.anchors[0]), set(self.anchors[1])]
+        board.words_on_board = list(self.words_on_board)
+        board.placed_squares = list(self.placed_squares)
+        board.word_score_dict = dict(self.word_score_dict)
+        board.all_moves = list(self.all_moves)
+        board.found_moves = []
+        board.anchor_counts = list(self.anchor_counts)
+        board.prune_stats = dict(self.prune_stats)
+        board.rest_bounds = {}
+        board.turn_stats = []
+        if board.stats:
+            board._instrument()
+        return board
+
+    # letter of the tile on a square, "" if it is empty
+    def letter_at(self, row, col):
+        return LETTER_OF_CODE[self.letters[row, col]]
+
+    def is_blank(self, row, col):
+        return bool(self.blanks[row, col])
+
+    # premium of a square not covered yet: "2LS", "3LS", "2WS", "3WS" or ""
+    def premium_at(self, row, col):
+        if self.letter_multipliers[row, col] > 1:
+            return f"{self.letter_multipliers[row, col]}LS"
+        if self.word_multipliers[row, col] > 1:
+            return f"{self.word_multipliers[row, col]}WS"
+        return ""
+
+    # put a tile on a square, or take it off with an empty letter. premiums only count the turn a tile is
+    # played, covered squares have none. cross-checks and anchors are left alone, callers setting up a board
+    # square by square call update_all_cross_checks and update_all_anchors afterwards
+    def set_tile(self, row, col, letter, blank=False):
+        if self.occupied[row, col]:
+            self.zobrist_hash ^= zobrist_key(row, col, self.letter_at(row, col), self.is_blank(row, col))
+        if letter:
+            self.letters[row, col] = LETTER_CODES[letter] + 1
+            self.blanks[row, col] = blank
+            self.occupied[row, col] = 1
+            self.letter_multipliers[row, col] = 1
+            self.word_multipliers[row, col] = 1
+            self.zobrist_hash ^= zobrist_key(row, col, letter, blank)
+        else:
+            self.letters[row, col] = 0
+            self.blanks[row, col] = 0
+            self.occupied[row, col] = 0
+            self.letter_multipliers[row, col] = PREMIUM_LETTER_MULTIPLIERS[row, col]
+            self.word_multipliers[row, col] = PREMIUM_WORD_MULTIPLIERS[row, col]
+        self.loaded_line = None
+
+    # score of a tile on the board, blanks are worth nothing and premiums only count the turn a tile is played
+    def tile_score(self, row, col):
+        if self.blanks[row, col]:
+            return 0
+        return self.point_dict[self.letter_at(row, col)]
+
+    # recompute both cross-check masks and cross-word scores of an empty square from the tiles around it. with
+    # changes given, the square and its old masks and scores are appended to it first
+    def _update_cross_checks(self, row, col, changes=None):
+        if self.occupied[row, col] or self.sentinels[row, col]:
+            return
+        if changes is not None:
+            changes.append((row, col, self.cross_checks[0, row, col], self.cross_checks[1, row, col],
+                            self.cross_scores[0, row, col], self.cross_scores[1, row, col]))
+
+        for orientation, (row_step, col_step) in enumerate(((1, 0), (0, 1))):
+            before = ""
+            after = ""
+            cross_score = 0
+            r = row - row_step
+            c = col - col_step
+            while self.occupied[r, c]:
+                before = self.letter_at(r, c) + before
+                cross_score += self.tile_score(r, c)
+                r -= row_step
+                c -= col_step
+            r = row + row_step
+            c = col + col_step
+            while self.occupied[r, c]:
+                after += self.letter_at(r, c)
+                cross_score += self.tile_score(r, c)
+                r += row_step
+                c += col_step
+            self.cross_checks[orientation, row, col] = self._cross_check_mask(before, after)
+            self.cross_scores[orientation, row, col] = cross_score if before or after else -1
+        self.loaded_line = None
+
+    # recompute every cross-check. callers that set up a board square by square call this afterwards, so the
+    # zobrist hash is rebuilt from the board here as well
+    def update_all_cross_checks(self):
+        for row in range(15):
+            for col in range(15):
+                self._update_cross_checks(row, col)
+        self.zobrist_hash = 0
+        for row, col in np.argwhere(self.occupied).tolist():
+            self.zobrist_hash ^= zobrist_key(row, col, self.letter_at(row, col), self.is_blank(row, col))
+        for word in set(self.words_on_board):
+            self.zobrist_hash ^= zobrist_word_key(word)
+
+    # add or remove a square from the anchor sets of both orientations. with changes given, every change
+    # to a set is appended to it as (orientation, anchor, added)
+    def _update_anchor(self, row, col, changes=None):
+        occupied = self.occupied[row, col]
+        # anchors are keyed by the coordinates of the view they are used in
+        for orientation, anchor, is_anchor in ((0, (row, col), occupied and not self.occupied[row, col - 1]),
+                                               (1, (col, row), occupied and not self.occupied[row - 1, col])):
+            anchors = self.anchors[orientation]
+            if (anchor in anchors) != is_anchor:
+                if is_anchor:
+                    anchors.add(anchor)
+                else:
+                    anchors.discard(anchor)
+                if changes is not None:
+                    changes.append((orientation, anchor, is_anchor))
+
+    # rebuild the anchor sets from scratch, needed if tiles were put on the board with set_tile. rolling the
+    # occupancy one square right (down) lines every square up with its left (upper) neighbor, the first
+    # column (row) with the sentinel border
+    def update_all_anchors(self):
+        occupied = self.occupied.astype(bool)
+        across = occupied & ~np.roll(occupied, 1, axis=1)
+        down = occupied & ~np.roll(occupied, 1, axis=0)
+        self.anchors = [set(map(tuple, np.argwhere(across).tolist())),
+                        {(col, row) for row, col in np.argwhere(down).tolist()}]
+
+    # copy the squares of a line of the board (a row for orientation 0, a column for 1) into the line_* lists
+    # move generation reads. the recursion looks squares up far more often than numpy scalar indexing can
+    # keep up with, list indexing is several times faster
+    def _load_line(self, orientation, row):
+        if self.loaded_line == (orientation, row):
+            return
+        self.loaded_line = (orientation, row)
+        index = (slice(None), row) if orientation else row
+        self.line_letters = [LETTER_OF_CODE[code] for code in self.letters[index].tolist()]
+        # face value of the tile on each square, 0 for blanks and empty squares
+        self.line_tile_scores = [0 if blank else self.point_dict.get(letter, 0)
+                                 for letter, blank in zip(self.line_letters, self.blanks[index].tolist())]
+        self.line_visible = [not sentinel for sentinel in self.sentinels[index].tolist()]
+        self.line_cross_checks = self.cross_checks[orientation][index].tolist()
+        self.line_cross_scores = [None if score < 0 else score
+                                  for score in self.cross_scores[orientation][index].tolist()]
+        self.line_letter_multipliers = self.letter_multipliers[index].tolist()
+        self.line_word_multipliers = self.word_multipliers[index].tolist()
+
+    # a left part's squares are only known once it is complete, since each new letter shifts the earlier
+    # ones left. check every left part letter against the cross-checks of the square it ended up on
+    def _left_part_fits(self, col, word):
+        cross_checks = self.line_cross_checks
+        for letter in word:
+            if letter == "%":
+                continue
+            if not cross_checks[col] >> LETTER_CODES[letter] & 1:
+                return False
+            col += 1
         return True
 
-    # TODO: fix scoring errors
-    def _score_word(self, word, squares, dist_from_anchor):
+    # main word score before the word multiplier, word multiplier, cross-word score and number of placed
+    # tiles of word laid from start_col in the processing row. tiles already on the board count at face
+    # value, placed tiles get the square's premiums and also score the cross-word they join, using the
+    # cross-word score cached for the square
+    def _partial_score(self, word, start_col):
+        letters = self.line_letters
         score = 0
-        score_multiplier = 1
-
-        if self.is_transpose:
-            cross_sum_ind = "-"
-        else:
-            cross_sum_ind = "+"
-
+        word_multiplier = 1
+        cross_score = 0
+        tiles_used = 0
+        col = start_col
+        for letter in word:
+            # the tile just placed was a blank, take back what its letter scored
+            if letter == "%":
+                score -= tile_score
+                if cross_multiplier:
+                    cross_score -= tile_score * cross_multiplier
+                continue
+            if letters[col]:
+                score += self.line_tile_scores[col]
+                col += 1
+                continue
+            tiles_used += 1
+            tile_score = self.point_dict[letter] * self.line_letter_multipliers[col]
+            score += tile_score
+            word_multiplier *= self.line_word_multipliers[col]
+            cross_multiplier = 0
+            if self.line_cross_scores[col] is not None:
+                cross_multiplier = self.line_word_multipliers[col]
+                cross_score += (self.line_cross_scores[col] + tile_score) * cross_multiplier
+            col += 1
+        return score, word_multiplier, cross_score, tiles_used
+
+    # score a move spelling word from start_col in the processing row and add it to found_moves
+    def _score_word(self, word, start_col):
         # word that will be inserted onto board shouldn't have wildcard indicator
         board_word = word.replace("%", "")
 
-        coords = self.processing_row, self.processing_col - dist_from_anchor
-        if not self.vertical_check(*coords, board_word):
-            return
-
         # don't add words that are already on the board
         # TODO remove?
         if board_word in self.words_on_board:
-            return board_word, 0
-
-        # remove letters before wildcard indicators
-        word = re.sub("[A-Z]%", "%", word)
-
-        # maintain list of which tiles were pulled from word rack
-        rack_tiles = []
-        for letter, square in zip(word, squares):
-            # add cross-sum by adding first and second letter scores from orthogonal two-letter word
-            if cross_sum_ind in square.modifier:
-                score += int(square.modifier[-1])
-            if square.modifier:
-                rack_tiles.append(letter)
-            if "2LS" in square.modifier:
-                score += (self.point_dict[letter] * 2)
-            elif "3LS" in square.modifier:
-                score += (self.point_dict[letter] * 3)
-            elif "2WS" in square.modifier:
-                score_multiplier *= 2
-                score += self.point_dict[letter]
-            elif "3WS" in square.modifier:
-                score_multiplier *= 3
-                score += self.point_dict[letter]
-            else:
-                score += self.point_dict[letter]
+            return
 
-        if not rack_tiles:
+        score, word_multiplier, cross_score, tiles_used = self._partial_score(word, start_col)
+        if not tiles_used:
             # no tiles used from rack
             return
 
-        score *= score_multiplier
+        score = score * word_multiplier + cross_score
 
         # check for bingo
-        if len(rack_tiles) == 7:
+        if tiles_used == 7:
             score += 50
 
-        if self.is_transpose:
-            coords = coords[1], coords[0]
-        self.all_moves.append((*coords, word, score, 'v' if self.is_transpose else 'h', rack_tiles))
-
-        if score > self.highest_score:
-            self.best_word = board_word
-            self.highest_score = score
-            # distance of leftmost placed tile from anchor. if anchor is leftmost tile distance will be 0.
-            self.dist_from_anchor = dist_from_anchor
-            self.letters_from_rack = rack_tiles
+        if score < self.min_score:
+            return
 
-    def _extend_right(self, start_node, square_row, square_col, rack, word, squares, dist_from_anchor):
-        square = self.board[square_row][square_col]
+        # maintain list of which tiles were pulled from word rack
+        rack_tiles = ["%" if blank else letter
+                      for (letter, blank), square_letter in zip(word_tiles(word), self.line_letters[start_col:])
+                      if not square_letter]
+        coords = self.processing_row, start_col
+        orientation = self.processing_orientation
+        if orientation:
+            coords = coords[1], coords[0]
+        self.found_moves.append((*coords, word, score, 'v' if orientation else 'h', rack_tiles))
+
+    # squares of the processing row a move can still cover from col onwards with tiles_left tiles and at most
+    # max_letters more letters: every tile up to the square where either runs out. returns the score of
+    # those tiles, the letter multipliers of the empty squares and upper bounds on their word multiplier and
+    # cross-word scores
+    def _rest_squares(self, col, tiles_left, max_letters=15):
+        max_tile_score = self.rack_scores[0] if self.rack_scores else 0
+        tile_sum = 0
+        letter_multipliers = []
+        word_multiplier = 1
+        cross_score = 0
+        for col in range(col, col + max_letters):
+            if self.line_letters[col]:
+                tile_sum += self.line_tile_scores[col]
+            elif not self.line_visible[col] or len(letter_multipliers) == tiles_left:
+                break
+            else:
+                letter_multiplier = self.line_letter_multipliers[col]
+                letter_multipliers.append(letter_multiplier)
+                word_multiplier *= self.line_word_multipliers[col]
+                if self.line_cross_scores[col] is not None:
+                    cross_score += (self.line_cross_scores[col] + max_tile_score * letter_multiplier) \
+                                   * self.line_word_multipliers[col]
+        return tile_sum, letter_multipliers, word_multiplier, cross_score
+
+    # highest total the best tiles on the rack can make on these letter multipliers
+    def _best_tile_sum(self, letter_multipliers):
+        return sum(tile_score * multiplier
+                   for tile_score, multiplier in zip(self.rack_scores, sorted(letter_multipliers, reverse=True)))
+
+    # upper bounds on the main word score, word multiplier and cross-word score a move can add from col
+    # onwards with at most max_letters letters and tiles_left tiles, and the number of those tiles that fit
+    def _rest_bound(self, col, max_letters, tiles_left):
+        key = (self.processing_orientation, self.processing_row, col, max_letters, tiles_left)
+        if key not in self.rest_bounds:
+            tile_sum, letter_multipliers, word_multiplier, cross_score = \
+                self._rest_squares(col, tiles_left, max_letters)
+            self.rest_bounds[key] = (tile_sum + self._best_tile_sum(letter_multipliers), word_multiplier,
+                                     cross_score, len(letter_multipliers))
+        return self.rest_bounds[key]
+
+    # upper bound on the score of a move that starts with word laid from start_col. rest_bound(*args,
+    # tiles_left) bounds what the tiles still on the rack can add
+    def _move_bound(self, word, start_col, rest_bound, *args):
+        score, word_multiplier, cross_score, tiles_used = self._partial_score(word, start_col)
+        rest_score, rest_multiplier, rest_cross_score, rest_tiles = rest_bound(*args, self.rack_size - tiles_used)
+        bound = (score + rest_score) * word_multiplier * rest_multiplier + cross_score + rest_cross_score
+        if self.rack_size == 7 and tiles_used + rest_tiles == 7:
+            bound += 50
+        return bound
+
+    # count a search branch and check if its bound says the moves it leads to can be skipped. nothing can
+    # be skipped before min_score is raised above 0
+    def _prune_branch(self, word, start_col, rest_bound, *args):
+        if not self.min_score:
+            return False
+        self.prune_stats["branches"] += 1
+        if self._move_bound(word, start_col, rest_bound, *args) < self.min_score:
+            self.prune_stats["branches_pruned"] += 1
+            return True
+        return False
+
+    # upper bound on the score of any move through an anchor tile: the best rack tiles go on the best letter
+    # premiums among the empty squares the rack can reach on either side, every word premium among them
+    # counts and every cross-word gets the highest tile on the rack
+    def _anchor_bound(self, orientation, row, col):
+        self._load_line(orientation, row)
+        self.processing_orientation = orientation
+        self.processing_row = row
+        max_tile_score = self.rack_scores[0] if self.rack_scores else 0
+        tile_sum, letter_multipliers, word_multiplier, cross_score = self._rest_squares(col, self.rack_size)
+        # left parts can't run into other tiles or off the board
+        left_col = col - 1
+        while col - left_col <= self.rack_size and self.line_visible[left_col] and \
+                not self.line_letters[left_col - 1]:
+            letter_multiplier = self.line_letter_multipliers[left_col]
+            letter_multipliers.append(letter_multiplier)
+            word_multiplier *= self.line_word_multipliers[left_col]
+            if self.line_cross_scores[left_col] is not None:
+                cross_score += (self.line_cross_scores[left_col] + max_tile_score * letter_multiplier) \
+                               * self.line_word_multipliers[left_col]
+            left_col -= 1
+        bound = (tile_sum + self._best_tile_sum(letter_multipliers)) * word_multiplier + cross_score
+        if self.rack_size == 7 and len(letter_multipliers) >= 7:
+            bound += 50
+        return bound
+
+    # move generation works on the line loaded by get_all_words, squares are addressed by their column in it
+    def _extend_right(self, start_node, square_col, rack, word, dist_from_anchor):
+        letter = self.line_letters[square_col]
 
         # execute if square is empty
-        if not square.letter:
-            if start_node.is_terminal:
-                self._score_word(word, squares, dist_from_anchor)
-            for letter in start_node.children:
-                # if square already has letters above and below it, don't try to extend
-                if self.board[square_row + 1][square_col].letter and self.board[square_row - 1][square_col].letter:
+        if not letter:
+            if self.dawg.is_terminal(start_node):
+                self._score_word(word, self.processing_col - dist_from_anchor)
+            if not self.line_visible[square_col]:
+                return
+
+            cross_check = self.line_cross_checks[square_col]
+            for code, new_node in self.dawg.edges(start_node):
+                # skip letters that don't form a word with the tiles above and below
+                if not cross_check >> code & 1:
                     continue
-
-                # conditional for blank squares
-                if letter in rack:
-                    wildcard = False
-                elif "%" in rack:
-                    wildcard = True
-                else:
-                    continue
-                if letter in rack and square.visible:
-                    new_node = start_node.children[letter]
-                    new_rack = rack.copy()
-                    if wildcard:
-                        new_word = word + letter + "%"
-                        new_rack.remove("%")
-                    else:
-                        new_word = word + letter
-                        new_rack.remove(letter)
-                    new_squares = squares + [square]
-                    self._extend_right(new_node, square_row, square_col + 1, new_rack, new_word, new_squares,
-                                       dist_from_anchor)
+                # take the tile off the rack for the recursion and put it back afterwards
+                for tile, letter in TILE_CHOICES[code]:
+                    if not rack[tile]:
+                        continue
+                    rack[tile] -= 1
+                    self._extend_right(new_node, square_col + 1, rack, word + letter, dist_from_anchor)
+                    rack[tile] += 1
         else:
-            if square.letter in start_node.children:
-                new_node = start_node.children[square.letter]
-                new_word = word + square.letter
-                new_squares = squares + [square]
-                self._extend_right(new_node, square_row, square_col + 1, rack, new_word, new_squares,
-                                   dist_from_anchor)
-
-    def _left_part(self, start_node, anchor_square_row, anchor_square_col, rack, word, squares, limit,
-                   dist_from_anchor):
-        potential_square = self.board[anchor_square_row][anchor_square_col - dist_from_anchor]
-        if potential_square.letter:
+            new_node = self.dawg.child(start_node, letter)
+            if new_node is not None:
+                self._extend_right(new_node, square_col + 1, rack, word + letter, dist_from_anchor)
+
+    # build left parts of dist_from_anchor letters on the empty squares before the anchor tile and extend
+    # each one right through the anchor tile
+    def _left_part(self, start_node, anchor_col, rack, word, dist_from_anchor):
+        potential_col = anchor_col - dist_from_anchor - 1
+        # a left part running into another tile would make a word that belongs to that tile's anchor
+        if self.line_letters[potential_col]:
             return
-        self._extend_right(start_node, anchor_square_row, anchor_square_col, rack, word, squares, dist_from_anchor)
-        if not potential_square.visible:
+        # moves have to use the anchor tile. the opening move has no tile to use, its left part has to
+        # cover the center square instead
+        anchor_letter = self.line_letters[anchor_col]
+        if (dist_from_anchor or anchor_letter) and self._left_part_fits(anchor_col - dist_from_anchor, word):
+            if not anchor_letter:
+                self._extend_right(start_node, anchor_col, rack, word, dist_from_anchor)
+            else:
+                # most left parts can't be followed by the anchor tile, only those get bounded and extended
+                new_node = self.dawg.child(start_node, anchor_letter)
+                if new_node is not None and \
+                        not (self.prune_branches and
+                             self._prune_branch(word + anchor_letter, anchor_col - dist_from_anchor,
+                                                self._rest_bound, anchor_col + 1,
+                                                self.dawg.max_suffix_length(new_node))):
+                    self._extend_right(new_node, anchor_col + 1, rack, word + anchor_letter, dist_from_anchor)
+        if not self.line_visible[potential_col]:
             return
-        if limit > 0:
-            for letter in start_node.children:
-                # conditional for blank squares
-                if letter in rack:
-                    wildcard = False
-                elif "%" in rack:
-                    wildcard = True
-                else:
+        for code, new_node in self.dawg.edges(start_node):
+            for tile, letter in TILE_CHOICES[code]:
+                if not rack[tile]:
                     continue
+                rack[tile] -= 1
+                self._left_part(new_node, anchor_col, rack, word + letter, dist_from_anchor + 1)
+                rack[tile] += 1
+
+    # gaddag generation from the anchor square at anchor_col: the anchor tile, or the center square on the
+    # opening move
+    def _gaddag_anchor(self, anchor_col, rack):
+        anchor_letter = self.line_letters[anchor_col]
+        if anchor_letter:
+            new_node = self.gaddag.child(self.gaddag.root, anchor_letter)
+            if new_node is not None:
+                self._gaddag_left(new_node, anchor_col, anchor_col, rack, anchor_letter)
+            return
 
-                new_node = start_node.children[letter]
-                new_rack = rack.copy()
-                if wildcard:
-                    new_word = word + letter + "%"
-                    new_rack.remove("%")
-                else:
-                    new_word = word + letter
-                    new_rack.remove(letter)
-                new_squares = squares + [potential_square]
-                self._left_part(new_node, anchor_square_row, anchor_square_col, new_rack, new_word, new_squares,
-                                limit - 1, dist_from_anchor + 1)
+        cross_check = self.line_cross_checks[anchor_col]
+        for code, new_node in self.gaddag.edges(self.gaddag.root):
+            if not cross_check >> code & 1:
+                continue
+            for tile, letter in TILE_CHOICES[code]:
+                if not rack[tile]:
+                    continue
+                rack[tile] -= 1
+                self._gaddag_left(new_node, anchor_col, anchor_col, rack, letter)
+                rack[tile] += 1
+
+    # start_node has read the letters of word from the anchor square leftwards to start_col. the word can
+    # end at the anchor square, cross the separator to continue right of it, or grow further left
+    def _gaddag_left(self, start_node, start_col, anchor_col, rack, word):
+        letters = self.line_letters
+        if self.gaddag.is_terminal(start_node) and not letters[anchor_col + 1]:
+            self._score_word(word, start_col)
+        separator_node = self.gaddag.child(start_node, GADDAG_SEPARATOR)
+        if separator_node is not None and \
+                not (self.prune_branches and
+                     self._prune_branch(word, start_col, self._rest_bound, anchor_col + 1,
+                                        self.gaddag.max_suffix_length(separator_node))):
+            self._gaddag_right(separator_node, anchor_col + 1, start_col, rack, word)
+
+        # the square before a new left tile has to stay empty, a tile there would belong to another anchor
+        if not self.line_visible[start_col - 1] or letters[start_col - 2]:
+            return
+        cross_check = self.line_cross_checks[start_col - 1]
+        for code, new_node in self.gaddag.edges(start_node):
+            # also skips the separator, its code is past the letter bits
+            if not cross_check >> code & 1:
+                continue
+            for tile, letter in TILE_CHOICES[code]:
+                if not rack[tile]:
+                    continue
+                rack[tile] -= 1
+                self._gaddag_left(new_node, start_col - 1, anchor_col, rack, letter + word)
+                rack[tile] += 1
+
+    # right of the anchor square the gaddag reads the rest of the word in board order, like _extend_right
+    def _gaddag_right(self, start_node, square_col, start_col, rack, word):
+        square_letter = self.line_letters[square_col]
+        if square_letter:
+            new_node = self.gaddag.child(start_node, square_letter)
+            if new_node is not None:
+                self._gaddag_right(new_node, square_col + 1, start_col, rack, word + square_letter)
+            return
 
+        if self.gaddag.is_terminal(start_node):
+            self._score_word(word, start_col)
+        if not self.line_visible[square_col]:
+            return
+        cross_check = self.line_cross_checks[square_col]
+        for code, new_node in self.gaddag.edges(start_node):
+            if not cross_check >> code & 1:
+                continue
+            for tile, letter in TILE_CHOICES[code]:
+                if not rack[tile]:
+                    continue
+                rack[tile] -= 1
+                self._gaddag_right(new_node, square_col + 1, start_col, rack, word + letter)
+                rack[tile] += 1
 
     def print_board(self):
         print("    ", end="")
         [print(str(num).zfill(2), end=" ") for num in range(1, 16)]
         print()
-        for i, row in enumerate(self.board):
-            if i != 15:
-                print(str(i + 1).zfill(2), end="  ")
-            [print(square, end="  ") for square in row]
+        for row in range(BOARD_SIZE):
+            if row != 15:
+                print(str(row + 1).zfill(2), end="  ")
+            for col in range(BOARD_SIZE):
+                print("" if self.sentinels[row, col] else self.letter_at(row, col) or "_", end="  ")
             print()
         print()
 
     # method to insert words into board by row and column number
     # using 1-based indexing for user input
-    def insert_word(self, row, col, word):
+    # row and col are coordinates in the view of the given orientation, 0 inserts across and 1 inserts down.
+    # letters followed by "%" are placed as blanks. returns the undo entry of the move, see undo_move
+    def insert_word(self, row, col, word, orientation=0):
+        tiles = word_tiles(word)
+        word = word.replace("%", "")
         if len(word) + col > 15:
-            print(f'Cannot insert word "{word}" at column {col + 1}, '
-                  f'row {row + 1} not enough space')
-            return
+            raise Exception(f'Cannot insert word "{word}" at column {col + 1}, '
+                            f'row {row + 1} not enough space')
         curr_col = col
-        modifiers = []
-        for i, letter in enumerate(word):
-            curr_square_letter = self.board[row][curr_col].letter
-            modifiers.append(self.board[row][curr_col].modifier)
+        # what undo_move puts back as it was
+        last_state = (self.zobrist_hash, self.placed_squares, self.placed_orientation)
+        self.placed_squares = []
+        self.placed_orientation = orientation
+        for letter, blank in tiles:
+            board_row, board_col = (curr_col, row) if orientation else (row, curr_col)
+            curr_square_letter = self.letter_at(board_row, board_col)
             # if current square already has a letter in it, check to see if it's the same letter as
             # the one we're trying to insert. If not, insertion fails, undo any previous insertions
             if curr_square_letter:
@@ -320,91 +964,284 @@ class ScrabbleBoard:
                 else:
                     raise Exception(f"Failed to inserd word {word} at {row},{col}")
             else:
-                self.board[row][curr_col].letter = letter
-
-                # reset any modifiers to 0 once they have a tile placed on top of them
-                self.board[row][curr_col].modifier = ""
-
+                # premiums are used up once a tile is placed on top of them
+                self.set_tile(board_row, board_col, letter, blank)
+                self.placed_squares.append((board_row, board_col))
                 curr_col += 1
 
+        if word not in self.words_on_board:
+            self.zobrist_hash ^= zobrist_word_key(word)
         self.words_on_board.append(word)
 
-    # gets all words that can be made using a selected filled square and the current word rack
-    def get_all_words(self, square_row, square_col, rack):
-        # get all words that start with the filled letter
-        self._extend_right(self.dawg_root, square_row, square_col, rack, "", [], 0)
+        # a new tile can only change whether it, the square to its right or the square below it is an anchor
+        anchor_changes = []
+        for r, c in self.placed_squares:
+            self._update_anchor(r, c, anchor_changes)
+            self._update_anchor(r, c + 1, anchor_changes)
+            self._update_anchor(r + 1, c, anchor_changes)
+
+        # only the empty squares at the ends of the runs through the new tiles can have new cross-checks
+        run_ends = set()
+        for r, c in self.placed_squares:
+            for row_step, col_step in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                end_row = r + row_step
+                end_col = c + col_step
+                while self.occupied[end_row, end_col]:
+                    end_row += row_step
+                    end_col += col_step
+                run_ends.add((end_row, end_col))
+        cross_check_changes = []
+        for r, c in run_ends:
+            self._update_cross_checks(r, c, cross_check_changes)
+        # a word that was already on the board places no tiles, and the entry holds nothing to put back
+        return self.placed_squares, cross_check_changes, anchor_changes, last_state
+
+    # play a (row, col, word, score, direction, rack_tiles) move on the board without any of the
+    # bookkeeping of a turn, returns the undo entry that takes it back off
+    def apply_move(self, move):
+        row, col, word = move[:3]
+        if move[4] == "v":
+            return self.insert_word(col, row, word, 1)
+        return self.insert_word(row, col, word)
+
+    # take back the move of an undo entry from insert_word or apply_move, the last move played first. the
+    # entry holds the squares the move covered, the empty squares whose cross-checks were recomputed with
+    # their old masks and scores, the squares that were added to or removed from the anchor sets, and the
+    # zobrist hash, placed_squares and placed_orientation from before. taking the tiles off puts the premiums
+    # back
+    def undo_move(self, undo):
+        placed, cross_check_changes, anchor_changes, last_state = undo
+        # set_tile without the zobrist hash, it is put back whole
+        letters, blanks, occupied = self.letters, self.blanks, self.occupied
+        for square in placed:
+            letters[square] = blanks[square] = occupied[square] = 0
+            self.letter_multipliers[square] = PREMIUM_LETTER_MULTIPLIERS[square]
+            self.word_multipliers[square] = PREMIUM_WORD_MULTIPLIERS[square]
+        self.loaded_line = None
+        self.words_on_board.pop()
+        for orientation, anchor, added in reversed(anchor_changes):
+            if added:
+                self.anchors[orientation].discard(anchor)
+            else:
+                self.anchors[orientation].add(anchor)
+        self.zobrist_hash, self.placed_squares, self.placed_orientation = last_state
+        cross_checks, cross_scores = self.cross_checks, self.cross_scores
+        for row, col, across_mask, down_mask, across_score, down_score in cross_check_changes:
+            cross_checks[0, row, col] = across_mask
+            cross_checks[1, row, col] = down_mask
+            cross_scores[0, row, col] = across_score
+            cross_scores[1, row, col] = down_score
+
+    # words formed by the last insert_word: the word along the move and every cross-word through a tile it
+    # placed. a new move can only make these invalid, the rest of the board was checked before
+    def last_move_words(self):
+        words = []
+        for i, (row, col) in enumerate(self.placed_squares):
+            for orientation, line, index in ((0, self.letters[row], col), (1, self.letters[:, col], row)):
+                # the word along the move runs through every placed tile, take it once
+                if i and orientation == self.placed_orientation:
+                    continue
+                text = grid_text(line)
+                word = text[text.rfind(".", 0, index) + 1:text.index(".", index)]
+                if len(word) > 1:
+                    words.append(word)
+        return words
+
+    # gets all words that can be made using a selected filled square and the current word rack.
+    # square_row and square_col are coordinates in the view of the given orientation, rack is a list of
+    # tile counts from rack_to_counts
+    def get_all_words(self, square_row, square_col, rack, orientation=0):
+        self._load_line(orientation, square_row)
+        self.processing_orientation = orientation
+        self.processing_row = square_row
+        self.processing_col = square_col
+        if self.engine == "gaddag":
+            self._gaddag_anchor(square_col, rack)
+        else:
+            self._left_part(self.dawg.root, square_col, rack, "", 0)
+
+    # opening moves from the alphagram index: every word the rack makes, with blanks on every set of squares
+    # they can take, laid across every start column that puts a tile on the center square
+    def _opening_moves(self, word_rack):
+        tiles = rack_to_counts(word_rack)
+        blanks = tiles[BLANK_CODE]
+        for word in self.alphagrams.rack_words(word_rack):
+            if not blanks:
+                for start_col in range(max(0, 8 - len(word)), min(7, 15 - len(word)) + 1):
+                    self._score_word(word, start_col)
+                continue
+            # the squares of each letter that can get blanks: at least the copies the real tiles don't
+            # cover, at most as many as there are blanks
+            letter_choices = []
+            for letter in set(word):
+                squares = [i for i, square_letter in enumerate(word) if square_letter == letter]
+                needed = max(0, len(squares) - tiles[LETTER_CODES[letter]])
+                letter_choices.append([choice for used in range(needed, min(len(squares), blanks) + 1)
+                                       for choice in itertools.combinations(squares, used)])
+            for choices in itertools.product(*letter_choices):
+                blank_squares = set().union(*choices)
+                if len(blank_squares) > blanks:
+                    continue
+                spelled = "".join(letter + "%" if i in blank_squares else letter for i, letter in enumerate(word))
+                for start_col in range(max(0, 8 - len(word)), min(7, 15 - len(word)) + 1):
+                    self._score_word(spelled, start_col)
+
+    # yields every move for word_rack as a (row, col, word, score, direction, rack_tiles) tuple, opening
+    # moves through the center square if the board is empty. moves are found one anchor at a time and
+    # handed out before the next anchor is searched, so the board must not change while iterating
+    def iter_moves(self, word_rack):
+        self.min_score = 0
+        self.found_moves = []
+        rack = rack_to_counts(word_rack)
+        self.rack_size = len(word_rack)
+        self.rack_scores = sorted((self.point_dict[letter] for letter in word_rack), reverse=True)
+        self.rest_bounds = {}
 
-        # create anchor square only if the space is empty
-        if self.board[square_row][square_col - 1].letter:
+        # board symmetrical at start so just always play the start move horizontally
+        if not self.anchors[0] and not self.anchors[1]:
+            self._load_line(0, 7)
+            self.processing_orientation = 0
+            self.processing_row = 7
+            self.processing_col = 8
+            if self.alphagrams is not None:
+                self._opening_moves(word_rack)
+            elif self.engine == "gaddag":
+                self._gaddag_anchor(7, rack)
+            else:
+                self._left_part(self.dawg.root, 8, rack, "", 0)
+            moves, self.found_moves = self.found_moves, []
+            yield from moves
             return
 
-        # try every letter in rack as possible anchor square
-        for i, letter in enumerate(rack):
-            # Only allow anchor square with trivial cross-checks
-            potential_square = self.board[square_row][square_col - 1]
-            if not potential_square.visible or potential_square.letter:
+        # anchors are visited in row-major order of their view, same as a scan of the board would
+        anchors = [(orientation, row, col) for orientation in (0, 1)
+                   for row, col in sorted(self.anchors[orientation])]
+        # when pruning, search the anchors with the highest bounds first so min_score rises quickly, and
+        # stop once the rest can't reach it
+        if self.prune:
+            bounds = {anchor: self._anchor_bound(*anchor) for anchor in anchors}
+            anchors.sort(key=bounds.get, reverse=True)
+            self.prune_stats["anchors"] += len(anchors)
+        for i, (orientation, row, col) in enumerate(anchors):
+            if self.prune and bounds[orientation, row, col] < self.min_score:
+                self.prune_stats["anchors_pruned"] += len(anchors) - i
+                return
+            self.get_all_words(row, col, rack, orientation)
+            moves, self.found_moves = self.found_moves, []
+            yield from moves
+
+    # the k best moves for word_rack, best first, or all of them if k is None. moves are ranked by key,
+    # higher is better, or by score if there is no key. ties go to the larger move tuple so the result
+    # doesn't depend on the order the engine found the moves in
+    def top_moves(self, word_rack, k=None, key=None):
+        if not self.cache_size:
+            return self._top_moves(word_rack, k, key)
+        cache_key = (self.zobrist_hash, tuple(sorted(word_rack)), k, key)
+        moves = self.move_cache.get(cache_key)
+        if moves is None:
+            self.cache_stats["misses"] += 1
+            moves = tuple((*move[:5], tuple(move[5])) for move in self._top_moves(word_rack, k, key))
+            self.move_cache[cache_key] = moves
+            if len(self.move_cache) > self.cache_size:
+                self.move_cache.popitem(last=False)
+        else:
+            self.cache_stats["hits"] += 1
+            self.move_cache.move_to_end(cache_key)
+        return [(*move[:5], list(move[5])) for move in moves]
+
+    def _top_moves(self, word_rack, k, key):
+        if self.workers > 1 and (self.anchors[0] or self.anchors[1]):
+            return self._parallel_top_moves(word_rack, k, key)
+        moves = self.iter_moves(word_rack)
+        if k is None:
+            if key is None:
+                return sorted(moves, key=lambda m: (m[3], m), reverse=True)
+            return sorted(moves, key=lambda m: (key(m), m), reverse=True)
+
+        # min-heap of the k best (rank, move) pairs so far, the worst of them on top
+        heap = []
+        for move in moves:
+            item = (move[3] if key is None else key(move), move)
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+            else:
                 continue
-            temp_rack = rack[:i] + rack[i + 1:]
-            self.board[square_row][square_col - 1].letter = letter
-            self._left_part(self.dawg_root, square_row, square_col - 1, temp_rack, "", [], 6, 1)
-
-        # reset anchor square spot to blank after trying all combinations
-        self.board[square_row][square_col - 1].letter = None
+            # once the heap is full nothing scoring below its worst move can get in, let _score_word drop
+            # those moves before building them
+            if key is None and len(heap) == k:
+                self.min_score = heap[0][0]
+        return [move for _, move in sorted(heap, reverse=True)]
+
+    # top_moves split over the worker pool. anchors are handed out a whole line (a row across or a column
+    # down) at a time, each worker keeps the k best moves of its lines and the results are merged here
+    # with the same ranking. key has to be picklable, e.g. a module-level function
+    def _parallel_top_moves(self, word_rack, k, key):
+        lines = {}
+        for orientation in (0, 1):
+            for row, col in self.anchors[orientation]:
+                lines.setdefault((orientation, row), []).append((row, col))
+        lines = sorted(lines.items())
+        # a few tasks per worker so one crowded line doesn't hold up the rest
+        num_tasks = min(len(lines), self.workers * 4)
+        tasks = [lines[i::num_tasks] for i in range(num_tasks)]
+
+        search_id = next(_search_ids)
+        state = pickle.dumps(self)
+        pool = _move_pool(self.workers, self.dawg, self.gaddag)
+        moves = []
+        results = pool.map(_search_lines, itertools.repeat(search_id), itertools.repeat(state),
+                           itertools.repeat(word_rack), tasks, itertools.repeat(k), itertools.repeat(key))
+        for task_moves, prune_stats, counters in results:
+            moves += task_moves
+            for name, count in prune_stats.items():
+                self.prune_stats[name] += count
+            # the workers' search counts add up, phase times are measured here as wall time
+            for name in ("anchors", "edges", "candidates", "moves"):
+                if name in counters:
+                    self.counters[name] += counters[name]
+
+        if key is None:
+            moves.sort(key=lambda m: (m[3], m), reverse=True)
+        else:
+            moves.sort(key=lambda m: (key(m), m), reverse=True)
+        return moves if k is None else moves[:k]
 
-    # scan all tiles on board in both transposed and non-transposed state, find best move
-    def get_best_move(self, word_rack):
+    # ranking key of the moves for word_rack, None to rank them by score
+    def move_key(self, word_rack):
+        if self.leaves is not None and self.tiles_in_bag != 0:
+            return EquityKey(self.leaves, word_rack)
+        return None
 
+    # keep the best moves in all_moves and play the first one
+    def _play_best_move(self, word_rack, keep):
         self.word_rack = word_rack
+        self.all_moves = self.top_moves(word_rack, keep, self.move_key(word_rack))
+        #print(self.all_moves)
+        return self._play_first_move(word_rack)
 
-        # reset word variables to clear out words from previous turns
+    # play the first move of all_moves and take its tiles off word_rack
+    def _play_first_move(self, word_rack):
         self.best_word = ""
         self.highest_score = 0
-        self.best_row = 0
-        self.best_col = 0
-
-        self.all_moves = []
-
-        transposed = False
-        for row in range(0, 15):
-            for col in range(0, 15):
-                curr_square = self.board[row][col]
-                if curr_square.letter and (not self.board[row][col - 1].letter):
-                    prev_best_score = self.highest_score
-                    self.processing_row=row
-                    self.processing_col=col
-                    self.get_all_words(row, col, word_rack)
-                    if self.highest_score > prev_best_score:
-                        self.best_row = row
-                        self.best_col = col
-
-        self._transpose()
-        for row in range(0, 15):
-            for col in range(0, 15):
-                curr_square = self.board[row][col]
-                if curr_square.letter and (not self.board[row][col - 1].letter):
-                    prev_best_score = self.highest_score
-                    self.processing_row=row
-                    self.processing_col=col
-                    self.get_all_words(row, col, word_rack)
-                    if self.highest_score > prev_best_score:
-                        transposed = True
-                        self.best_row = row
-                        self.best_col = col
-
-        self.all_moves = sorted(self.all_moves, key=lambda m:m[3], reverse=True)
-        #print(self.all_moves)
+        self.letters_from_rack = []
 
         # Don't try to insert word if we couldn't find one
-        if not self.best_word:
-            self._transpose()
+        if not self.all_moves:
             return word_rack
 
-        if transposed:
-            self.insert_word(self.best_row, self.best_col - self.dist_from_anchor, self.best_word)
-            self._transpose()
+        row, col, word, score, direction, rack_tiles = self.all_moves[0]
+        self.best_word = word.replace("%", "")
+        self.highest_score = score
+        self.letters_from_rack = rack_tiles
+        self.best_row = row
+        self.best_col = col
+        self.best_orientation = 1 if direction == "v" else 0
+        if self.best_orientation:
+            self.insert_word(col, row, word, 1)
         else:
-            self._transpose()
-            self.insert_word(self.best_row, self.best_col - self.dist_from_anchor, self.best_word)
+            self.insert_word(row, col, word)
 
         self.word_score_dict[self.best_word] = self.highest_score
 
@@ -414,121 +1251,260 @@ class ScrabbleBoard:
 
         return word_rack
 
-    def get_start_move(self, word_rack):
-        # board symmetrical at start so just always play the start move horizontally
-        # try every letter in rack as possible anchor square
-        self.best_row = 7
-        self.best_col = 8
-        self.all_moves = []
-        for i, letter in enumerate(word_rack):
-            potential_square = self.board[7][8]
-            temp_rack = word_rack[:i] + word_rack[i + 1:]
-            potential_square.letter = letter
-            self.processing_row=7
-            self.processing_col=8
-            self._left_part(self.dawg_root, 7, 8, temp_rack, "", [], 6, 1)
-
-        self.all_moves = sorted(self.all_moves, key=lambda m:m[3], reverse=True)
-
-        # reset anchor square spot to blank after trying all combinations
-        self.board[7][8].letter = None
-        self.insert_word(self.best_row, self.best_col - self.dist_from_anchor, self.best_word)
-        # self.board[7][8].modifier = "" that's a bug, modifier isn't changed here. Also should be reverted to "Standard", not ""
-        self.word_score_dict[self.best_word] = self.highest_score
+    # generate words from every anchor across and down the board, play the best one. the keep best moves
+    # are left in all_moves, keep=None keeps every move
+    def get_best_move(self, word_rack, keep=1):
+        self.anchor_counts.append((len(self.anchors[0]), len(self.anchors[1])))
+        return self._play_best_move(word_rack, keep)
+
+    # play the best move on the empty board, through the center square
+    def get_start_move(self, word_rack, keep=1):
+        return self._play_best_move(word_rack, keep)
+
+    # one simulation rollout: play move from word_rack on a clone of the board, deal the opponent a rack
+    # from the shuffled unseen tiles and refill ours, then let both sides play plies more moves with
+    # get_best_move. returns the spread, points for minus points against, plus the difference of both
+    # sides' last leaves while there are tiles left to draw and the board has a leave table
+    def _rollout(self, move, word_rack, unseen, plies, seed):
+        rng = random.Random(seed)
+        board = self.clone()
+        board.workers = 1
+        board.all_moves = [move]
+        racks = [list(word_rack), []]
+        board._play_first_move(racks[0])
+        spread = move[3]
+        bag = list(unseen)
+        rng.shuffle(bag)
+        leaves = [list(racks[0]), None]
+        racks[1] = [bag.pop() for _ in range(min(7, len(bag)))]
+        racks[0] += [bag.pop() for _ in range(min(7 - len(racks[0]), len(bag)))]
+
+        player = 1
+        for _ in range(plies):
+            if not racks[0] or not racks[1]:
+                break
+            board.tiles_in_bag = len(bag)
+            rack = board.get_best_move(racks[player])
+            if board.best_word:
+                spread += board.highest_score if player == 0 else -board.highest_score
+            leaves[player] = list(rack)
+            racks[player] = rack + [bag.pop() for _ in range(min(7 - len(rack), len(bag)))]
+            player = 1 - player
+
+        if self.leaves is not None and bag:
+            for player, sign in ((0, 1), (1, -1)):
+                if leaves[player] is not None and len(leaves[player]) <= MAX_LEAVE:
+                    spread += sign * self.leaves.value(leaves[player])
+        return spread
+
+    # Monte Carlo simulation of the best candidates moves for word_rack, SIMULATION_CANDIDATES if candidates
+    # is None, or of the first candidates of moves, all of them if candidates is None, e.g.
+    # moves=top_moves(word_rack, 10). a single candidate has nothing to be compared with and gets no rollouts.
+    # unseen are the tiles this side can't see, the bag and the opponent's rack. every rollout plays a
+    # candidate, then plies more moves by both sides (see _rollout). rollouts are played in rounds of batch
+    # per candidate, until each candidate has had iterations of them or time_limit seconds have passed. after
+    # each round, candidates that are out of contention (see STOP_DEVIATIONS) get no more rollouts, and the
+    # simulation ends when one is left. rollout i of every candidate is dealt the same tiles, from seed and i,
+    # so differences between candidates aren't down to the luck of the draw, and results don't depend on the
+    # number of workers. with more than one worker the rollouts run on the move generation pool. returns and
+    # keeps in simulation a dict per candidate: the move, its mean spread and standard deviation, its number
+    # of rollouts and whether it was stopped early, by mean spread best first
+    def simulate(self, word_rack, unseen, moves=None, candidates=None, plies=2, iterations=100, time_limit=None,
+                 batch=4, seed=0):
+        start = time.perf_counter()
+        if moves is None:
+            moves = self.top_moves(word_rack, SIMULATION_CANDIDATES if candidates is None else candidates,
+                                   self.move_key(word_rack))
+        moves = moves[:candidates]
+        spreads = [[] for _ in moves]
+        live = list(range(len(moves)))
+        if self.workers > 1:
+            search_id = next(_search_ids)
+            state = pickle.dumps(self)
+            pool = _move_pool(self.workers, self.dawg, self.gaddag)
+
+        done = 0
+        while len(live) > 1 and done < iterations:
+            if time_limit is not None and time.perf_counter() - start >= time_limit:
+                break
+            seeds = [f"{seed}/{i}" for i in range(done, min(done + batch, iterations))]
+            done += len(seeds)
+            if self.workers == 1:
+                for c in live:
+                    spreads[c] += [self._rollout(moves[c], word_rack, unseen, plies, s) for s in seeds]
+            else:
+                # split each candidate's seeds so every worker has something to do
+                chunks = max(1, min(len(seeds), self.workers // len(live)))
+                tasks = [(c, seeds[i::chunks]) for c in live for i in range(chunks)]
+                results = pool.map(_simulate_rollouts, itertools.repeat(search_id), itertools.repeat(state),
+                                   [moves[c] for c, _ in tasks], itertools.repeat(word_rack),
+                                   itertools.repeat(unseen), itertools.repeat(plies),
+                                   [task_seeds for _, task_seeds in tasks])
+                by_seed = {}
+                for (c, task_seeds), task_spreads in zip(tasks, results):
+                    by_seed.update(((c, s), spread) for s, spread in zip(task_seeds, task_spreads))
+                for c in live:
+                    spreads[c] += [by_seed[c, s] for s in seeds]
+
+            # every live candidate has had the same rollouts, compare each with the leader rollout by rollout
+            if done >= MIN_ROLLOUTS:
+                leader = max(live, key=lambda c: (statistics.mean(spreads[c]), -c))
+                for c in list(live):
+                    if c == leader:
+                        continue
+                    diffs = [a - b for a, b in zip(spreads[leader], spreads[c])]
+                    if statistics.mean(diffs) > STOP_DEVIATIONS * statistics.stdev(diffs) / math.sqrt(len(diffs)):
+                        live.remove(c)
+
+        self.simulation = [{"move": move, "spread": statistics.mean(spreads[c]) if spreads[c] else 0.0,
+                            "stdev": statistics.stdev(spreads[c]) if len(spreads[c]) > 1 else 0.0,
+                            "rollouts": len(spreads[c]), "stopped": c not in live}
+                           for c, move in enumerate(moves)]
+        self.simulation.sort(key=lambda result: result["spread"], reverse=True)
+        return self.simulation
+
+    # simulate the best candidates moves for word_rack and play the one with the best mean spread.
+    # simulation_args are passed on to simulate
+    def get_simulated_move(self, word_rack, unseen, candidates=SIMULATION_CANDIDATES, **simulation_args):
+        if self.anchors[0] or self.anchors[1]:
+            self.anchor_counts.append((len(self.anchors[0]), len(self.anchors[1])))
+        self.word_rack = word_rack
+        self.all_moves = [result["move"] for result in self.simulate(word_rack, unseen, None, candidates,
+                                                                     **simulation_args)]
+        return self._play_first_move(word_rack)
+
+    # with the bag empty, search the endgame for the best line against opponent_rack and play its first
+    # move. the line is kept in endgame
+    def get_endgame_move(self, word_rack, opponent_rack, time_limit=None):
+        if self.anchors[0] or self.anchors[1]:
+            self.anchor_counts.append((len(self.anchors[0]), len(self.anchors[1])))
+        self.word_rack = word_rack
+        self.endgame = solve_endgame(self, word_rack, opponent_rack, time_limit)
+        self.all_moves = [move for move in self.endgame["line"][:1] if move is not None]
+        return self._play_first_move(word_rack)
 
-        for letter in self.letters_from_rack:
-            if letter in word_rack:
-                word_rack.remove(letter)
 
-        return word_rack
+# letters of a grid (or line) of the letter layer as one string, empty squares as ".". the sentinel border
+# keeps the runs of one row (or column) from joining up with the next
+def grid_text(letters):
+    return np.where(letters, letters + (ord("A") - 1), ord(".")).astype(np.uint8).tobytes().decode("ascii")
 
 
-# returns a list of all words played on the board
+# returns a list of all words played on a ScrabbleBoard: every run of two or more tiles across, row by row,
+# then down, column by column
 def all_board_words(board):
-    board_words = []
-
-    # check regular board
-    for row in range(0, 15):
-        temp_word = ""
-        for col in range(0, 16):
-            letter = board[row][col].letter
+    text = grid_text(board.letters) + grid_text(board.letters.T)
+    return [word for word in text.split(".") if len(word) > 1]
+
+
+# the 15 rows of a board as text, "." for empty squares and blanks in lowercase
+def board_rows(board):
+    return ["".join((letter.lower() if board.is_blank(row, col) else letter) or "." for col, letter in
+                    enumerate(board.letter_at(row, col) for col in range(15))) for row in range(15)]
+
+
+# put the tiles of 15 rows of text in board_rows' format on board, and bring its cross-checks and anchors up
+# to date
+def place_rows(board, rows):
+    for row, line in enumerate(rows):
+        for col, letter in enumerate(line):
+            if letter != ".":
+                board.set_tile(row, col, letter.upper(), letter.islower())
+    board.update_all_cross_checks()
+    board.update_all_anchors()
+
+
+# the hundred tiles of a full bag, blanks as "%"
+def new_tile_bag():
+    return ["A"] * 9 + ["B"] * 2 + ["C"] * 2 + ["D"] * 4 + ["E"] * 12 + ["F"] * 2 + ["G"] * 3 + \
+           ["H"] * 2 + ["I"] * 9 + ["J"] * 1 + ["K"] * 1 + ["L"] * 4 + ["M"] * 2 + ["N"] * 6 + \
+           ["O"] * 8 + ["P"] * 2 + ["Q"] * 1 + ["R"] * 6 + ["S"] * 4 + ["T"] * 6 + ["U"] * 4 + \
+           ["V"] * 2 + ["W"] * 2 + ["X"] * 1 + ["Y"] * 2 + ["Z"] * 1 + ["%"] * 2
+
+
+# the tiles the player holding word_rack can't see, the bag and the opponent's rack: a full bag less the
+# tiles on the board and on the rack
+def unseen_tiles(board, word_rack):
+    unseen = new_tile_bag()
+    for row in range(15):
+        for col in range(15):
+            letter = board.letter_at(row, col)
             if letter:
-                temp_word += letter
-            else:
-                if len(temp_word) > 1:
-                    board_words.append(temp_word)
-                temp_word = ""
-
-    # check transposed board
-    for col in range(0, 16):
-        temp_word = ""
-        for row in range(0, 16):
-            letter = board[row][col].letter
-            if letter:
-                temp_word += letter
-            else:
-                if len(temp_word) > 1:
-                    board_words.append(temp_word)
-                temp_word = ""
-
-    return board_words
+                tile = "%" if board.is_blank(row, col) else letter
+                if tile in unseen:
+                    unseen.remove(tile)
+    for tile in word_rack:
+        if tile in unseen:
+            unseen.remove(tile)
+    return unseen
 
 
-def refill_word_rack(rack, tile_bag):
+def refill_word_rack(rack, tile_bag, rng=random):
     to_add = min([7 - len(rack), len(tile_bag)])
-    new_letters = random.sample(tile_bag, to_add)
+    new_letters = rng.sample(tile_bag, to_add)
     rack = rack + new_letters
     return rack, new_letters
 
 
-def play_game():
-    #seed = random.randint(0, 10000)
-    #random.seed(4005)
-    score = 0
-    tile_bag = ["A"] * 9 + ["B"] * 2 + ["C"] * 2 + ["D"] * 4 + ["E"] * 12 + ["F"] * 2 + ["G"] * 3 + \
-               ["H"] * 2 + ["I"] * 9 + ["J"] * 1 + ["K"] * 1 + ["L"] * 4 + ["M"] * 2 + ["N"] * 6 + \
-               ["O"] * 8 + ["P"] * 2 + ["Q"] * 1 + ["R"] * 6 + ["S"] * 4 + ["T"] * 6 + ["U"] * 4 + \
-               ["V"] * 2 + ["W"] * 2 + ["X"] * 1 + ["Y"] * 2 + ["Z"] * 1 + ["%"] * 2
-
-    to_load = open("lexicon/scrabble_words_complete.pickle", "rb")
-    root = pickle.load(to_load)
-    to_load.close()
-    word_rack = random.sample(tile_bag, 7)
+# play a game of the solver against the bag, drawing tiles with rng. root is the lexicon, board_args are
+# passed on to the board. after every turn the words on the board are checked against the lexicon, all of
+# them with check_words="board" or only those the move formed with "move". returns the game's record: total
+# score, moves played, bingos, racks thrown back, how long each turn took to solve, every turn's play (the
+# rack, the word played and its score, the tiles left on the rack and the tiles left in the bag to draw
+# from, blanks as "%") and the board's turn_stats if it keeps stats
+def play_game(root=None, rng=random, verbose=True, check_words="board", **board_args):
+    if check_words not in ("board", "move"):
+        raise Exception(f"Unknown word check {check_words}")
+    tile_bag = new_tile_bag()
+    record = {"score": 0, "turns": 0, "bingos": 0, "exchanges": 0, "turn_times": [], "plays": []}
+
+    if root is None:
+        root = open_dawg("lexicon/scrabble_words_complete.dawg")
+    word_rack = rng.sample(tile_bag, 7)
     [tile_bag.remove(letter) for letter in word_rack]
-    game = ScrabbleBoard(root)
-    word_rack = game.get_start_move(word_rack)
-    score += game.highest_score
-    word_rack, new_letters = refill_word_rack(word_rack, tile_bag)
-    [tile_bag.remove(letter) for letter in new_letters]
+    game = ScrabbleBoard(root, **board_args)
+    move = game.get_start_move
 
     play = True
     while play:
-        # game.print_board()
-        for word in all_board_words(game.board):
-            if not find_in_dawg(word, root) and word:
-                raise Exception(f"Invalid word on board: {word}")
-        word_rack = game.get_best_move(word_rack)
-        score += game.highest_score
-        word_rack, new_letters = refill_word_rack(word_rack, tile_bag)
+        rack = "".join(word_rack)
+        start = time.perf_counter()
+        game.tiles_in_bag = len(tile_bag)
+        word_rack = move(word_rack)
+        record["turn_times"].append(time.perf_counter() - start)
+        record["plays"].append({"rack": rack, "word": game.best_word, "score": game.highest_score,
+                                "leave": "".join(word_rack), "bag": len(tile_bag)})
+        move = game.get_best_move
+        if game.best_word:
+            record["score"] += game.highest_score
+            record["turns"] += 1
+            record["bingos"] += len(game.letters_from_rack) == 7
+        word_rack, new_letters = refill_word_rack(word_rack, tile_bag, rng)
         [tile_bag.remove(letter) for letter in new_letters]
+        if check_words == "board":
+            words = all_board_words(game)
+        else:
+            words = game.last_move_words() if game.best_word else []
+        for word, valid in zip(words, find_all_in_dawg(words, root)):
+            if not valid:
+                game.print_board()
+                raise Exception(f"Invalid word on board: {word}")
         if game.best_word == "":
             # draw new hand if can't find any words
             if len(tile_bag) >= 7:
                 return_to_bag_words = word_rack.copy()
-                word_rack, new_letters = refill_word_rack([], tile_bag)
+                word_rack, new_letters = refill_word_rack([], tile_bag, rng)
                 [tile_bag.remove(letter) for letter in new_letters]
-
+                record["exchanges"] += 1
             else:
                 play = False
-                for word in all_board_words(game.board):
-                    if not find_in_dawg(word, root) and word:
-                        game.print_board()
-                        #print(seed)
-                        raise Exception(f"Invalid word on board: {word}")
 
-    game.print_board()
+    if verbose:
+        game.print_board()
+    if game.stats:
+        record["turn_stats"] = game.turn_stats
 
-    return score
+    return record
 
 
 state = """
@@ -551,26 +1527,16 @@ state = """
 
 
 if __name__ == "__main__":
+    root = open_dawg("lexicon/scrabble_words_complete.dawg")
     while True:
-        score = play_game()
+        score = play_game(root)["score"]
         print(f"score: {score}")
 
 
 if __name__ == "__main__123":
-    scores = []
-    runs = 150
-    for _ in range(runs):
-        scores.append(play_game())
-
-    print(sum(scores) / runs)
-
-
-if __name__ == "__main__123":
-    to_load = open("lexicon/scrabble_words_complete.pickle", "rb")
-    with open("lexicon/scrabble_words_complete.pickle", "rb") as f:
-        root = pickle.load(f)
+    root = open_dawg("lexicon/scrabble_words_complete.dawg")
     game = ScrabbleBoard(root)
-    game.get_start_move(["Q", "X", "R"])
+    game.get_start_move(["Q", "X", "R"], keep=15)
     if not game.all_moves:
         print("No move found")
     for move in game.all_moves[:15]:
@@ -579,9 +1545,7 @@ if __name__ == "__main__123":
 
 
 if __name__ == "__main__123":
-    to_load = open("lexicon/scrabble_words_complete.pickle", "rb")
-    with open("lexicon/scrabble_words_complete.pickle", "rb") as f:
-        root = pickle.load(f)
+    root = open_dawg("lexicon/scrabble_words_complete.dawg")
     game = ScrabbleBoard(root)
 
     row=0
@@ -592,15 +1556,16 @@ if __name__ == "__main__123":
         if char==' ':
             col+=1
         elif 'a' <= char <= 'z':
-            game.board[row][col].letter=char.upper()
-            game.board[row][col].modifier=""
+            game.set_tile(row, col, char.upper())
             col+=1
         elif char == '|':
             col=0
             row+=1
         i+=1
+    game.update_all_cross_checks()
+    game.update_all_anchors()
 
-    game.get_best_move(["X"])
+    game.get_best_move(["X"], keep=15)
     if not game.all_moves:
         print("No move found")
     for move in game.all_moves[:15]:
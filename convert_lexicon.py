@@ -0,0 +1,50 @@
+# Converts a lexicon to the binary format that open_dawg memory-maps.
+#   python convert_lexicon.py [--gaddag | --alphagrams] [source] [destination]
+# source is either a pickled Node graph (the default, lexicon/scrabble_words_complete.pickle) or a text
+# file with one word per line. With --gaddag the words are written as a GADDAG for the gaddag move
+# generator instead of a dawg, with --alphagrams as the alphagram index that open_alphagrams maps.
+import sys
+import time
+
+from dawg import *
+from alphagrams import save_alphagrams
+
+
+def convert(source, destination, gaddag=False, alphagrams=False):
+    start = time.perf_counter()
+    if alphagrams:
+        if source.endswith(".pickle"):
+            word_list = list(dawg_words(load_pickle(source)))
+        else:
+            with open(source, "r") as f:
+                word_list = [word.strip().upper() for word in f if word.strip()]
+        save_alphagrams(word_list, destination)
+        print(f"{source} -> {destination}: {len(word_list)} words, {time.perf_counter() - start:.2f}s")
+        return
+    if source.endswith(".pickle"):
+        root = load_pickle(source)
+        if gaddag:
+            root = build_gaddag(dawg_words(root))
+    else:
+        with open(source, "r") as f:
+            word_list = sorted(word.strip().upper() for word in f if word.strip())
+        root = build_gaddag(word_list) if gaddag else build_dawg(word_list, minimize_linear)
+    compact_dawg = CompactDawg.from_node(root)
+    save_dawg(compact_dawg, destination)
+    elapsed = time.perf_counter() - start
+    print(f"{source} -> {destination}: {compact_dawg.num_nodes} nodes, "
+          f"{len(compact_dawg.edge_targets)} edges, {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    gaddag = "--gaddag" in args
+    if gaddag:
+        args.remove("--gaddag")
+    alphagrams = "--alphagrams" in args
+    if alphagrams:
+        args.remove("--alphagrams")
+    source = args[0] if len(args) > 0 else "lexicon/scrabble_words_complete.pickle"
+    extension = "gaddag" if gaddag else "alphagrams" if alphagrams else "dawg"
+    destination = args[1] if len(args) > 1 else "lexicon/scrabble_words_complete." + extension
+    convert(source, destination, gaddag, alphagrams)
@@ -1,4 +1,8 @@
+import mmap
 import pickle
+import struct
+import sys
+from array import array
 
 
 def build_trie(lexicon):
@@ -104,10 +108,30 @@ def minimize(curr_node, common_prefix_length, minimized_nodes, non_minimized_nod
     return curr_node
 
 
+# minimization function that keys minimized_nodes by a structural signature instead of the Node itself.
+# A node's children are final by the time it is popped, so its signature is computed exactly once and
+# each node costs a single tuple hash rather than __repr__ calls on every dict probe
+def minimize_linear(curr_node, common_prefix_length, minimized_nodes, non_minimized_nodes):
+    for _ in range(len(non_minimized_nodes), common_prefix_length, -1):
+
+        parent, letter, child = non_minimized_nodes.pop()
+
+        signature = (child.is_terminal, *[(key, val.id) for key, val in child.children.items()])
+        if signature in minimized_nodes:
+            parent.children[letter] = minimized_nodes[signature]
+
+        else:
+            minimized_nodes[signature] = child
+
+        curr_node = parent
+
+    return curr_node
+
+
 # function to build dawg from given lexicon
-def build_dawg(lexicon):
+def build_dawg(lexicon, minimize_fn=minimize):
     root = Node()
-    minimized_nodes = {root: root}
+    minimized_nodes = {}
     non_minimized_nodes = []
     curr_node = root
     prev_word = ""
@@ -117,7 +141,7 @@ def build_dawg(lexicon):
 
         # minimization step: only call minimize if there are nodes in non_minimized_nodes
         if non_minimized_nodes:
-            curr_node = minimize(curr_node, common_prefix_length, minimized_nodes, non_minimized_nodes)
+            curr_node = minimize_fn(curr_node, common_prefix_length, minimized_nodes, non_minimized_nodes)
 
         # adding new nodes after the common prefix
         for letter in word[common_prefix_length:]:
@@ -132,13 +156,377 @@ def build_dawg(lexicon):
         # if i % 1000 == 0:
         #     print(i)
 
-    minimize(curr_node, 0, minimized_nodes, non_minimized_nodes)
-    print(len(minimized_nodes))
+    minimize_fn(curr_node, 0, minimized_nodes, non_minimized_nodes)
+    # the root is never minimized, count it separately
+    print(len(minimized_nodes) + 1)
     return root
 
 
+# the GADDAG holds every word once per split point: the letters up to the split reversed, the separator,
+# then the rest of the word. Splitting after the last letter leaves out the separator
+def gaddag_strings(word):
+    for i in range(1, len(word)):
+        yield word[i - 1::-1] + GADDAG_SEPARATOR + word[i:]
+    yield word[::-1]
+
+
+# build a minimized GADDAG from the same word list build_dawg takes. The result is a Node graph that
+# CompactDawg.from_node and save_dawg handle like any other dawg
+def build_gaddag(lexicon):
+    return build_dawg(sorted(string for word in lexicon for string in gaddag_strings(word)), minimize_linear)
+
+
+# yields every word in a Node graph in lexicographic order
+def dawg_words(root):
+    stack = [(root, "")]
+    while stack:
+        node, prefix = stack.pop()
+        if node.is_terminal:
+            yield prefix
+        for letter, child in reversed(node.children.items()):
+            stack.append((child, prefix + letter))
+
+
+# letters are stored in the compact dawg as small ints, A=0 through Z=25. A GADDAG also has edges for
+# the separator, code 26
+LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+LETTER_CODES = {letter: code for code, letter in enumerate(LETTERS)}
+GADDAG_SEPARATOR = "^"
+SEPARATOR_CODE = len(LETTERS)
+EDGE_CODES = {**LETTER_CODES, GADDAG_SEPARATOR: SEPARATOR_CODE}
+# tiles of a rack that stand for any letter in lexicon queries, and the index of their count
+BLANK_TILES = "?%"
+BLANK_COUNT = len(LETTERS)
+
+
+# DAWG stored in flat arrays instead of a graph of Node objects. Nodes are integers, node 0 is the root.
+# The outgoing edges of node n are packed at positions edge_start[n] to edge_start[n + 1] of edge_letters
+# (letter codes) and edge_targets (child nodes), and bit n of terminals is set if node n ends a word.
+class CompactDawg:
+    def __init__(self, edge_start, edge_letters, edge_targets, terminals):
+        self.edge_start = edge_start
+        self.edge_letters = edge_letters
+        self.edge_targets = edge_targets
+        self.terminals = terminals
+        self.root = 0
+        self.num_nodes = len(edge_start) - 1
+        # max_suffix_length results, filled in as nodes are asked about
+        self.suffix_lengths = {}
+
+    # pack a Node graph into arrays, keeping each node's children in their original order
+    @classmethod
+    def from_node(cls, root):
+        node_ids = {root.id: 0}
+        order = [root]
+        for node in order:
+            for child in node.children.values():
+                if child.id not in node_ids:
+                    node_ids[child.id] = len(order)
+                    order.append(child)
+
+        edge_start = array("I", [0])
+        edge_letters = bytearray()
+        edge_targets = array("I")
+        terminals = bytearray((len(order) + 7) // 8)
+        for i, node in enumerate(order):
+            if node.is_terminal:
+                terminals[i >> 3] |= 1 << (i & 7)
+            for letter, child in node.children.items():
+                edge_letters.append(EDGE_CODES[letter])
+                edge_targets.append(node_ids[child.id])
+            edge_start.append(len(edge_targets))
+
+        return cls(edge_start, bytes(edge_letters), edge_targets, bytes(terminals))
+
+    def is_terminal(self, node):
+        return self.terminals[node >> 3] >> (node & 7) & 1
+
+    # (letter code, child node) pairs for every outgoing edge of node
+    def edges(self, node):
+        start = self.edge_start[node]
+        end = self.edge_start[node + 1]
+        return zip(self.edge_letters[start:end], self.edge_targets[start:end])
+
+    # follow the edge labelled letter out of node, returns None if there is no such edge
+    def child(self, node, letter):
+        code = EDGE_CODES.get(letter)
+        if code is None:
+            return None
+        i = self.edge_letters.find(code, self.edge_start[node], self.edge_start[node + 1])
+        if i < 0:
+            return None
+        return self.edge_targets[i]
+
+    # number of edges on the longest path from node to the end of a word
+    def max_suffix_length(self, node):
+        length = self.suffix_lengths.get(node)
+        if length is None:
+            length = 0
+            for _, child in self.edges(node):
+                length = max(length, 1 + self.max_suffix_length(child))
+            self.suffix_lengths[node] = length
+        return length
+
+    def find(self, word):
+        node = self.root
+        for letter in word:
+            node = self.child(node, letter)
+            if node is None:
+                return False
+        return bool(self.is_terminal(node))
+
+    # find for every word in words, in one call. the words are walked in sorted order so each one starts
+    # from the node reached by the prefix it shares with the word before it
+    def find_all(self, words):
+        found = [False] * len(words)
+        # path[i] is the node reached by the first i letters of the previous word, None once it fell off
+        path = [self.root]
+        prev_word = ""
+        for i in sorted(range(len(words)), key=words.__getitem__):
+            word = words[i]
+            del path[length_common_prefix(prev_word, word) + 1:]
+            node = path[-1]
+            for letter in word[len(path) - 1:]:
+                if node is None:
+                    break
+                node = self.child(node, letter)
+                path.append(node)
+            found[i] = node is not None and len(path) == len(word) + 1 and bool(self.is_terminal(node))
+            prev_word = word
+        return found
+
+    # node reached from node by following word, None if it falls off the graph
+    def walk(self, node, word):
+        for letter in word:
+            node = self.child(node, letter)
+            if node is None:
+                return None
+        return node
+
+    # every word matching pattern, in alphabetical order. "?" matches any one letter and "*" any run of
+    # letters, including none. the dawg is walked once, tracking the set of pattern positions each path can
+    # be at, so a word that matches the pattern in several ways is still only found once
+    def match(self, pattern):
+        pattern = pattern.upper()
+        end = len(pattern)
+
+        # positions reachable from positions without reading a letter, by skipping stars
+        def closure(positions):
+            closed = set()
+            for i in positions:
+                closed.add(i)
+                while i < end and pattern[i] == "*":
+                    i += 1
+                    closed.add(i)
+            return frozenset(closed)
+
+        # positions after reading letter, memoized since the same few sets come up all over the graph
+        steps = {}
+
+        def step(positions, letter):
+            key = (positions, letter)
+            if key not in steps:
+                steps[key] = closure({i if pattern[i] == "*" else i + 1 for i in positions
+                                      if i < end and pattern[i] in ("*", "?", letter)})
+            return steps[key]
+
+        words = []
+
+        def visit(node, positions, word):
+            if end in positions and word and self.is_terminal(node):
+                words.append(word)
+            for code, child in self.edges(node):
+                if code < len(LETTERS):
+                    next_positions = step(positions, LETTERS[code])
+                    if next_positions:
+                        visit(child, next_positions, word + LETTERS[code])
+
+        visit(self.root, closure({0}), "")
+        return words
+
+    # words of at least min_length letters that can be made from the tiles of rack, in alphabetical order.
+    # blanks ("?" or "%") stand for any letter. the walk is bounded by the rack and plays a letter from its
+    # own tile whenever there is one, which never rules out a word, so each word is reached once
+    def _rack_words(self, rack, min_length):
+        counts = [0] * (BLANK_COUNT + 1)
+        for tile in rack:
+            if tile in BLANK_TILES:
+                counts[BLANK_COUNT] += 1
+            else:
+                counts[LETTER_CODES[tile.upper()]] += 1
+        words = []
+
+        def visit(node, word):
+            if len(word) >= min_length and self.is_terminal(node):
+                words.append(word)
+            for code, child in self.edges(node):
+                if code >= len(LETTERS):
+                    continue
+                tile = code if counts[code] else BLANK_COUNT
+                if counts[tile]:
+                    counts[tile] -= 1
+                    visit(child, word + LETTERS[code])
+                    counts[tile] += 1
+
+        visit(self.root, "")
+        return words
+
+    # words that use every tile of rack
+    def anagrams(self, rack):
+        return self._rack_words(rack, len(rack))
+
+    # words that use min_length or more of the tiles of rack
+    def sub_anagrams(self, rack, min_length=2):
+        return self._rack_words(rack, min_length)
+
+    # (front, back) hooks of word: strings of the letters that make a word when put before or after it.
+    # back hooks take one walk. front hooks take one walk of gaddag, a GADDAG of the same words, where the
+    # word reversed is followed by its front hooks. without one every first letter is tried in turn
+    def hooks(self, word, gaddag=None):
+        word = word.upper()
+        node = self.walk(self.root, word)
+        back = "" if node is None else \
+            "".join(LETTERS[code] for code, child in self.edges(node) if self.is_terminal(child))
+        if gaddag is not None:
+            node = gaddag.walk(gaddag.root, word[::-1])
+            front = "" if node is None else \
+                "".join(LETTERS[code] for code, child in gaddag.edges(node)
+                        if code < len(LETTERS) and gaddag.is_terminal(child))
+        else:
+            front = ""
+            for code, child in self.edges(self.root):
+                node = self.walk(child, word)
+                if node is not None and self.is_terminal(node):
+                    front += LETTERS[code]
+        return front, back
+
+    # bytes used by the arrays and their containers
+    def nbytes(self):
+        return sum(sys.getsizeof(arr) for arr in
+                   (self.edge_start, self.edge_letters, self.edge_targets, self.terminals))
+
+
+# Binary lexicon format, all integers little-endian:
+#   header        magic b"DAWG", u16 version, u16 reserved, u32 node count, u32 edge count
+#   edge_start    u32 * (node count + 1)
+#   edge_targets  u32 * edge count
+#   terminals     (node count + 7) // 8 bytes
+#   edge_letters  u8 * edge count
+# The u32 sections come first so they stay 4-byte aligned and can be cast in place.
+DAWG_MAGIC = b"DAWG"
+DAWG_VERSION = 1
+DAWG_HEADER = struct.Struct("<4sHHII")
+LETTER_BYTES = [bytes([code]) for code in range(len(EDGE_CODES))]
+
+
+# CompactDawg whose arrays are views into a memory-mapped lexicon file. Nothing is deserialized, pages
+# are read in on first use and shared between every process that maps the same file. Pickling one only
+# stores the path, so handing it to another process maps the same file there.
+class MappedDawg(CompactDawg):
+    def __init__(self, file_map, num_nodes, num_edges, path=None):
+        self.path = path
+        start_offset = DAWG_HEADER.size // 4
+        targets_offset = start_offset + num_nodes + 1
+        terminals_offset = (targets_offset + num_edges) * 4
+        words = memoryview(file_map)[:terminals_offset].cast("I")
+        self.letters_offset = terminals_offset + (num_nodes + 7) // 8
+        self.file_map = file_map
+        super().__init__(words[start_offset:targets_offset],
+                         file_map,
+                         words[targets_offset:targets_offset + num_edges],
+                         memoryview(file_map)[terminals_offset:self.letters_offset])
+
+    def edges(self, node):
+        start = self.edge_start[node]
+        end = self.edge_start[node + 1]
+        return zip(self.edge_letters[self.letters_offset + start:self.letters_offset + end],
+                   self.edge_targets[start:end])
+
+    def child(self, node, letter):
+        code = EDGE_CODES.get(letter)
+        if code is None:
+            return None
+        i = self.edge_letters.find(LETTER_BYTES[code], self.letters_offset + self.edge_start[node],
+                                   self.letters_offset + self.edge_start[node + 1])
+        if i < 0:
+            return None
+        return self.edge_targets[i - self.letters_offset]
+
+    def nbytes(self):
+        return len(self.file_map)
+
+    def __reduce__(self):
+        if self.path is None:
+            raise Exception("Only lexicons opened with open_dawg can be pickled")
+        return open_dawg, (self.path,)
+
+
+# write a CompactDawg to path in the binary lexicon format
+def save_dawg(dawg, path):
+    sections = [array("I", dawg.edge_start), array("I", dawg.edge_targets)]
+    if sys.byteorder == "big":
+        for section in sections:
+            section.byteswap()
+    with open(path, "wb") as f:
+        f.write(DAWG_HEADER.pack(DAWG_MAGIC, DAWG_VERSION, 0, dawg.num_nodes, len(dawg.edge_targets)))
+        for section in sections:
+            f.write(section.tobytes())
+        f.write(bytes(dawg.terminals))
+        f.write(bytes(dawg.edge_letters))
+
+
+# memory-map a binary lexicon file, returns a MappedDawg ready to traverse
+def open_dawg(path):
+    if sys.byteorder == "big":
+        raise Exception("Binary lexicon files can only be mapped on little-endian hosts")
+    with open(path, "rb") as f:
+        file_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(file_map) < DAWG_HEADER.size:
+        raise Exception(f"{path} is not a binary lexicon file")
+    magic, version, _, num_nodes, num_edges = DAWG_HEADER.unpack_from(file_map)
+    if magic != DAWG_MAGIC:
+        raise Exception(f"{path} is not a binary lexicon file")
+    if version != DAWG_VERSION:
+        raise Exception(f"{path} has lexicon format version {version}, expected {DAWG_VERSION}")
+    expected_size = DAWG_HEADER.size + 4 * (num_nodes + 1 + num_edges) + (num_nodes + 7) // 8 + num_edges
+    if len(file_map) != expected_size:
+        raise Exception(f"{path} is truncated or corrupt")
+    return MappedDawg(file_map, num_nodes, num_edges, path)
+
+
+# the pickled lexicon was dumped from dawg.py's __main__, so its Node class path is __main__.Node.
+# resolve it to this module's Node no matter which script is loading it
+class _NodeUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if name == "Node":
+            return Node
+        return super().find_class(module, name)
+
+
+def load_pickle(path):
+    with open(path, "rb") as f:
+        return _NodeUnpickler(f).load()
+
+
+# approximate bytes used by a Node graph: every node object, its attribute dict and its children dict
+def node_graph_nbytes(root):
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        node = stack.pop()
+        if node.id in seen:
+            continue
+        seen.add(node.id)
+        total += sys.getsizeof(node) + sys.getsizeof(node.__dict__) + sys.getsizeof(node.children)
+        stack.extend(node.children.values())
+    return total
+
+
 # check if word is in dawg
 def find_in_dawg(word, curr_node):
+    if isinstance(curr_node, CompactDawg):
+        return curr_node.find(word)
     for letter in word:
         if letter in curr_node.children:
             curr_node = curr_node.children[letter]
@@ -150,11 +538,22 @@ def find_in_dawg(word, curr_node):
         return False
 
 
+# find_in_dawg for a list of words in one call, returns a list of booleans in the same order
+def find_all_in_dawg(words, root):
+    if isinstance(root, CompactDawg):
+        return root.find_all(words)
+    return [find_in_dawg(word, root) for word in words]
+
+
 if __name__ == "__main__":
     big_list = open("lexicon/scrabble_words_complete.txt", "r").readlines()
     big_list = [word.strip("\n") for word in big_list]
     build_trie(big_list)
-    root = build_dawg(big_list)
+    root = build_dawg(big_list, minimize_linear)
+    compact_dawg = CompactDawg.from_node(root)
+    print(f"Node graph: {node_graph_nbytes(root) / 2 ** 20:.1f} MiB, "
+          f"compact dawg: {compact_dawg.nbytes() / 2 ** 20:.1f} MiB")
     file_handler = open("lexicon/scrabble_words_complete.pickle", "wb")
     pickle.dump(root, file_handler)
     file_handler.close()
+    save_dawg(compact_dawg, "lexicon/scrabble_words_complete.dawg")
@@ -0,0 +1,128 @@
+# Derives a leave table from self-play logs (the JSON lines simulate.py writes) and saves it for equity mode.
+#   python derive_leaves.py LOG [LOG ...] [--output PATH] [--ridge R] [--shrink N]
+# A game against the bag ends when its hundred tiles run out, so a play is worth its score less the points
+# the tiles it uses would score on average. A leave's value is how much more than average the play after it
+# was worth, plus the average points of the tiles it keeps, since playing fewer tiles now leaves them for
+# later. Every play that kept 0 to 6 tiles and refilled the rack to seven from the bag is one observation.
+# Few of the 1.1 million leaves are ever seen, so values come from a ridge regression on what a leave holds:
+# each tile type once, twice and three or more times, each pair of tile types together, and the leave's
+# size. Leaves seen shrink toward their own mean the more often they were seen, with shrink observations
+# counting as much as the model.
+import argparse
+import itertools
+import json
+
+import numpy as np
+
+from dawg import *
+from leaves import *
+
+LEAVES_PATH = "lexicon/scrabble_words_complete.leaves"
+
+PAIRS = list(itertools.combinations(range(LEAVE_TILE_TYPES), 2))
+
+
+# (leave, score of the next play, tiles the next play used) of every play in the logs whose rack was refilled
+# in full, and the average points per tile played over all plays
+def read_observations(paths):
+    observations = []
+    points = tiles = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                plays = json.loads(line)["plays"]
+                for play in plays:
+                    points += play["score"]
+                    tiles += len(play["rack"]) - len(play["leave"])
+                for play, next_play in zip(plays, plays[1:]):
+                    leave = play["leave"]
+                    if play["word"] and next_play["word"] and len(leave) <= MAX_LEAVE and \
+                            play["bag"] >= 7 - len(leave):
+                        observations.append((leave, next_play["score"],
+                                             len(next_play["rack"]) - len(next_play["leave"])))
+    return observations, points / max(tiles, 1)
+
+
+# regression features of leaves given as a (leaves, tile types) array of tile counts
+def features(counts):
+    present = counts >= 1
+    sizes = counts.sum(axis=1)
+    columns = [present, counts >= 2, counts >= 3]
+    columns.append(np.stack([present[:, a] & present[:, b] for a, b in PAIRS], axis=1))
+    columns.append(sizes[:, None] == np.arange(MAX_LEAVE + 1))
+    return np.concatenate(columns, axis=1).astype(np.float64)
+
+
+# the fitted model's value of leaves given as tile counts, without building their features
+def model_values(counts, weights):
+    types = LEAVE_TILE_TYPES
+    present = (counts >= 1).astype(np.float64)
+    pairs = np.zeros((types, types))
+    pairs[tuple(zip(*PAIRS))] = weights[3 * types:3 * types + len(PAIRS)]
+    values = present @ weights[:types] + (counts >= 2) @ weights[types:2 * types] + \
+        (counts >= 3) @ weights[2 * types:3 * types] + ((present @ pairs) * present).sum(axis=1)
+    return values + weights[-(MAX_LEAVE + 1):][counts.sum(axis=1)]
+
+
+def tile_counts(codes):
+    counts = np.zeros((len(codes), LEAVE_TILE_TYPES), dtype=np.int64)
+    for i in range(codes.shape[1]):
+        np.add.at(counts, (np.arange(len(codes)), codes[:, i]), 1)
+    return counts
+
+
+# ridge regression weights of features for targets. the size columns are left unpenalized
+def fit(x, y, ridge):
+    penalty = np.full(x.shape[1], ridge)
+    penalty[-(MAX_LEAVE + 1):] = 0
+    return np.linalg.solve(x.T @ x + np.diag(penalty), x.T @ y)
+
+
+# value of every leave, in rank order
+def derive_leaves(observations, tile_points, ridge=10.0, shrink=20):
+    worth = np.array([score - tile_points * tiles for _, score, tiles in observations], dtype=np.float64)
+    targets = worth - worth.mean()
+    ranks = np.array([leave_index(leave_codes(leave)) for leave, _, _ in observations])
+    counts = np.zeros((len(observations), LEAVE_TILE_TYPES), dtype=np.int64)
+    for i, (leave, _, _) in enumerate(observations):
+        for code in leave_codes(leave):
+            counts[i, code] += 1
+    x = features(counts)
+    weights = fit(x, targets, ridge)
+    if not np.allclose(model_values(counts, weights), x @ weights):
+        raise Exception("Leave values disagree with the fitted model")
+
+    values = np.zeros(NUM_LEAVES)
+    sizes = np.zeros(NUM_LEAVES)
+    for size in range(MAX_LEAVE + 1):
+        leaves = list(itertools.combinations_with_replacement(range(LEAVE_TILE_TYPES), size))
+        codes = np.array(leaves, dtype=np.int64).reshape(len(leaves), size)
+        values[leave_indexes(codes)] = model_values(tile_counts(codes), weights)
+        sizes[SIZE_OFFSETS[size]:SIZE_OFFSETS[size + 1]] = size
+
+    seen = np.bincount(ranks, minlength=NUM_LEAVES)
+    totals = np.bincount(ranks, weights=targets, minlength=NUM_LEAVES)
+    values = (totals + shrink * values) / (seen + shrink) + tile_points * sizes
+    # only differences between leaves rank moves, keep the empty leave at zero
+    return values - values[SIZE_OFFSETS[0]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derive a leave table from self-play logs")
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument("--output", default=LEAVES_PATH)
+    parser.add_argument("--ridge", type=float, default=10.0)
+    parser.add_argument("--shrink", type=float, default=20)
+    args = parser.parse_args()
+
+    observations, tile_points = read_observations(args.logs)
+    if not observations:
+        raise Exception("No plays with a full refill in the logs")
+    values = derive_leaves(observations, tile_points, args.ridge, args.shrink)
+    save_leaves(values, args.output)
+    distinct = len({"".join(sorted(leave)) for leave, _, _ in observations})
+    print(f"{len(observations)} observations of {distinct} distinct leaves, {tile_points:.2f} points per tile")
+    table = open_leaves(args.output)
+    for leave in ("", "S", "%", "Q", "ERS", "AEINST", "IIU", "VVW", "EQU"):
+        print(f"{leave or '(empty)':<10}{table.value(leave):>8.2f}")
+    print(f"leave table written to {args.output}")
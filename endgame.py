@@ -0,0 +1,229 @@
+# Exact endgame search. Once the bag is empty both racks are known, and the game is a two-player game of
+# perfect information: the side to move picks the move sequence that maximizes its final spread, assuming
+# the opponent does the same. The search is a negamax alpha-beta over the moves of the board's move
+# generator, best scoring first, with iterative deepening and a transposition table keyed by the board's
+# zobrist hash and both racks. A game ends when a side plays out, scoring twice the tiles left on the other
+# rack, or after two passes in a row, each side losing the tiles left on its rack.
+import time
+from collections import OrderedDict
+
+# transposition table depth of a result that no depth limit cut short, good for any depth
+SOLVED = 1000
+
+# bounds of a transposition table value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class EndgameSolver:
+    # board is the position with the bag empty, word_rack the rack of the side to move and opponent_rack
+    # the other. the search plays and takes back moves on a copy of the board, with a move cache of
+    # cache_size positions so deeper iterations don't search the same position and rack twice
+    def __init__(self, board, word_rack, opponent_rack, cache_size=100000):
+        self.board = board.clone()
+        self.board.workers = 1
+        self.board.leaves = None
+        self.board.tiles_in_bag = 0
+        self.board.cache_size = cache_size
+        self.board.move_cache = OrderedDict()
+        self.board.cache_stats = {"hits": 0, "misses": 0}
+        self.racks = (tuple(sorted(word_rack)), tuple(sorted(opponent_rack)))
+        # position key: (zobrist hash, rack to move, other rack, passes in a row) to
+        # (depth, value, bound, best move)
+        self.table = {}
+        self.nodes = 0
+        # leaves cut off by the depth limit in the current iteration, none means the search was exact
+        self.horizon = 0
+        self.deadline = None
+
+    def rack_value(self, rack):
+        return sum(self.board.point_dict[tile] for tile in rack)
+
+    # estimate of a position the depth limit cuts off, for the side to move holding rack: what both sides
+    # would lose for the tiles left on their racks if the game ended there
+    def static_value(self, rack, other):
+        return self.rack_value(other) - self.rack_value(rack)
+
+    # play move (None for a pass) for the side to move holding rack, returns the undo entry and the rest
+    # of the rack
+    def play(self, rack, move):
+        if move is None:
+            return None, rack
+        rest = list(rack)
+        for tile in move[5]:
+            rest.remove(tile)
+        return self.board.apply_move(move), tuple(rest)
+
+    def take_back(self, undo):
+        if undo is not None:
+            self.board.undo_move(undo)
+
+    # moves of the side to move, the table's best move first, then by score, passing last
+    def ordered_moves(self, rack, best):
+        moves = self.board.top_moves(list(rack))
+        if best is not None and best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        moves.append(None)
+        return moves
+
+    # value for the side to move of the position: its points from here on less the opponent's
+    def negamax(self, rack, other, passes, depth, alpha, beta):
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise _OutOfTime()
+        if not other:
+            # the opponent played out
+            return -2 * self.rack_value(rack)
+        if passes == 2:
+            return self.rack_value(other) - self.rack_value(rack)
+        if depth == 0:
+            self.horizon += 1
+            return self.static_value(rack, other)
+
+        key = (self.board.zobrist_hash, rack, other, passes)
+        entry = self.table.get(key)
+        best = None
+        if entry is not None:
+            entry_depth, value, bound, best = entry
+            if entry_depth >= depth:
+                if bound == EXACT or (bound == LOWER and value >= beta) or (bound == UPPER and value <= alpha):
+                    if entry_depth != SOLVED:
+                        self.horizon += 1
+                    return value
+
+        start_alpha = alpha
+        horizon = self.horizon
+        best_value = None
+        if depth == 1:
+            # a move one ply from the horizon is worth its score, and twice the tiles left on the other rack
+            # if it plays out, or the static value of where it leaves the opponent. there is no need to play it
+            other_value = self.rack_value(other)
+            for move in self.ordered_moves(rack, best):
+                self.nodes += 1
+                if move is None:
+                    # two passes end the game and the static value is the final one
+                    value = other_value - self.rack_value(rack)
+                    if not passes:
+                        self.horizon += 1
+                elif len(move[5]) == len(rack):
+                    value = move[3] + 2 * other_value
+                else:
+                    rest = list(rack)
+                    for tile in move[5]:
+                        rest.remove(tile)
+                    value = move[3] + other_value - self.rack_value(rest)
+                    self.horizon += 1
+                if best_value is None or value > best_value:
+                    best_value = value
+                    best = move
+            self.table[key] = (SOLVED if self.horizon == horizon else depth, best_value, EXACT, best)
+            return best_value
+
+        for move in self.ordered_moves(rack, best):
+            undo, rest = self.play(rack, move)
+            score = 0 if move is None else move[3]
+            try:
+                value = score - self.negamax(other, rest, passes + 1 if move is None else 0, depth - 1,
+                                             -beta + score, -alpha + score)
+            finally:
+                self.take_back(undo)
+            if best_value is None or value > best_value:
+                best_value = value
+                best = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        bound = EXACT
+        if best_value <= start_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        self.table[key] = (SOLVED if self.horizon == horizon else depth, best_value, bound, best)
+        return best_value
+
+    # the principal variation, following the table's best moves from the root, or from first and then the
+    # table's best moves if first is given
+    def line(self, first=False):
+        rack, other, passes = self.racks[0], self.racks[1], 0
+        line = []
+        undos = []
+        if first is not False:
+            line.append(first)
+            undo, rest = self.play(rack, first)
+            undos.append(undo)
+            passes = 1 if first is None else 0
+            rack, other = other, rest
+        while rack and other and passes < 2:
+            entry = self.table.get((self.board.zobrist_hash, rack, other, passes))
+            if entry is None:
+                break
+            move = entry[3]
+            line.append(move)
+            undo, rest = self.play(rack, move)
+            undos.append(undo)
+            passes = passes + 1 if move is None else 0
+            rack, other = other, rest
+        for undo in reversed(undos):
+            self.take_back(undo)
+        return line
+
+    # value of playing move from the root, searched to depth plies in all
+    def move_value(self, move, depth):
+        rack, other = self.racks
+        undo, rest = self.play(rack, move)
+        try:
+            if not rest:
+                return move[3] + 2 * self.rack_value(other)
+            score = 0 if move is None else move[3]
+            return score - self.negamax(other, rest, 1 if move is None else 0, depth - 1, -10 ** 6, 10 ** 6)
+        finally:
+            self.take_back(undo)
+
+    # iterative deepening, one ply deeper each time, until a search is exact, max_depth is reached or
+    # time_limit seconds have passed. the result of the last finished iteration is kept. a result that isn't
+    # exact and doesn't beat the highest scoring move at the same depth plays that move instead
+    def solve(self, time_limit=None, max_depth=None):
+        start = time.perf_counter()
+        self.deadline = None if time_limit is None else start + time_limit
+        if max_depth is None:
+            # every move but a pass uses a tile, and two passes end the game
+            max_depth = 2 * (len(self.racks[0]) + len(self.racks[1])) + 2
+        result = {"value": None, "line": [], "depth": 0, "exact": False}
+        for depth in range(1, max_depth + 1):
+            self.horizon = 0
+            try:
+                value = self.negamax(self.racks[0], self.racks[1], 0, depth, -10 ** 6, 10 ** 6)
+            except _OutOfTime:
+                break
+            result = {"value": value, "line": self.line(), "depth": depth, "exact": self.horizon == 0}
+            if result["exact"]:
+                break
+        greedy = self.ordered_moves(self.racks[0], None)[0]
+        if not result["line"]:
+            # not even one ply finished in time, fall back on the best scoring move
+            result["line"] = [greedy]
+        elif not result["exact"] and result["line"][0] != greedy:
+            # the table from the deepest iteration makes this search quick, it isn't held to the deadline
+            self.deadline = None
+            greedy_value = self.move_value(greedy, result["depth"])
+            if greedy_value >= result["value"]:
+                result["value"] = greedy_value
+                result["line"] = self.line(greedy)
+        result["nodes"] = self.nodes
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+
+# best line for the side to move holding word_rack, the opponent holding opponent_rack and the bag empty.
+# returns a dict of the line's value (spread from here on for the side to move), the line itself (moves
+# of both sides in turn, None for a pass), the depth of the last finished iteration, whether the value is
+# exact, nodes searched and seconds taken
+def solve_endgame(board, word_rack, opponent_rack, time_limit=None, max_depth=None):
+    return EndgameSolver(board, word_rack, opponent_rack).solve(time_limit, max_depth)
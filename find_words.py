@@ -1,5 +1,4 @@
 from dawg import *
-import pickle
 
 
 class Square:
@@ -24,58 +23,59 @@ def score_word(word):
     return word, score
 
 
-def extend_right(start_node, square, rack, word):
+# words found are added to word_score_dict along with their scores
+def extend_right(dawg, start_node, square, rack, word, word_score_dict):
     # execute if square is empty
     if not square.letter:
-        if start_node.is_terminal:
+        if dawg.is_terminal(start_node):
             word, score = score_word(word)
             word_score_dict[word] = score
         for letter in rack:
-            if letter in start_node.children:
-                new_node = start_node.children[letter]
+            new_node = dawg.child(start_node, letter)
+            if new_node is not None:
                 new_rack = rack.copy()
                 new_rack.remove(letter)
                 new_word = word + letter
-                extend_right(new_node, square.right_neighbor, new_rack, new_word)
+                extend_right(dawg, new_node, square.right_neighbor, new_rack, new_word, word_score_dict)
     else:
-        if square.letter in start_node.children:
-            new_node = start_node.children[square.letter]
+        new_node = dawg.child(start_node, square.letter)
+        if new_node is not None:
             new_word = word + square.letter
-            extend_right(new_node, square.right_neighbor, rack, new_word)
+            extend_right(dawg, new_node, square.right_neighbor, rack, new_word, word_score_dict)
 
 
-def left_part(start_node, anchor_square, rack, word, limit):
-    extend_right(start_node, anchor_square, rack, word)
+def left_part(dawg, start_node, anchor_square, rack, word, limit, word_score_dict):
+    extend_right(dawg, start_node, anchor_square, rack, word, word_score_dict)
     if limit > 0:
         for letter in rack:
-            if letter in start_node.children:
-                new_node = start_node.children[letter]
+            new_node = dawg.child(start_node, letter)
+            if new_node is not None:
                 new_rack = rack.copy()
                 new_rack.remove(letter)
                 new_word = word + letter
-                left_part(new_node, anchor_square, new_rack, new_word, limit - 1)
+                left_part(dawg, new_node, anchor_square, new_rack, new_word, limit - 1, word_score_dict)
 
 
 # As a start, this function should take an already-filled square with no neighbors and compute
-# all possible words using the square and the tiles from the rack
-def get_all_words(start_node, square, rack, word):
+# all possible words using the square and the tiles from the rack. returns a dict of the words and
+# their scores
+def get_all_words(dawg, square, rack, word):
+    word_score_dict = {}
     # get all words that start with the filled letter
-    extend_right(start_node, square, rack, word)
+    extend_right(dawg, dawg.root, square, rack, word, word_score_dict)
 
     # try every letter in rack as possible anchor square
     for i, letter in enumerate(rack):
         anchor_square = Square(letter)
         anchor_square.right_neighbor = square
         temp_rack = rack[:i] + rack[i+1:]
-        left_part(start_node, anchor_square, temp_rack, "", 5)
+        left_part(dawg, dawg.root, anchor_square, temp_rack, "", 5, word_score_dict)
+    return word_score_dict
 
 
 if __name__ == "__main__":
-    to_load = open("lexicon/scrabble_words_complete.pickle", "rb")
-    root = pickle.load(to_load)
-    to_load.close()
+    root = open_dawg("lexicon/scrabble_words_complete.dawg")
 
-    word_score_dict = {}
     word_rack = ["E", "S", "T", "O"]
 
     placed_square = Square("H")
@@ -97,7 +97,7 @@ if __name__ == "__main__":
     f.right_neighbor = g
     g.right_neighbor = h
 
-    get_all_words(root, placed_square, word_rack, "")
+    word_score_dict = get_all_words(root, placed_square, word_rack, "")
 
     out = list(sorted(word_score_dict.items(), key=lambda x: x[1], reverse=True))
     [print(elem) for elem in out]
@@ -1,40 +1,8 @@
 from dawg import *
-from board import ScrabbleBoard
+from board import ScrabbleBoard, all_board_words
 import pygame
 import sys
 import random
-import pickle
-
-
-# returns a list of all words played on the board
-def all_board_words(board):
-    board_words = []
-
-    # check regular board
-    for row in range(0, 15):
-        temp_word = ""
-        for col in range(0, 16):
-            letter = board[row][col].letter
-            if letter:
-                temp_word += letter
-            else:
-                if len(temp_word) > 1:
-                    board_words.append(temp_word)
-                temp_word = ""
-
-    # check transposed board
-    for col in range(0, 16):
-        temp_word = ""
-        for row in range(0, 16):
-            letter = board[row][col].letter
-            if letter:
-                temp_word += letter
-            else:
-                if len(temp_word) > 1:
-                    board_words.append(temp_word)
-                temp_word = ""
-
-    return board_words
 
 
 def refill_word_rack(rack, tile_bag):
@@ -47,8 +15,8 @@ def refill_word_rack(rack, tile_bag):
 def draw_board(board):
     for y in range(15):
         for x in range(15):
-            if board[x][y].letter:
-                if board[x][y].letter == "I":
+            if board.letter_at(x, y):
+                if board.letter_at(x, y) == "I":
                     letter_x_offset = 15
                 else:
                     letter_x_offset = 7
@@ -56,15 +24,15 @@ def draw_board(board):
                                                          (margin + square_height) * y + margin + y_offset,
                                                          square_width, square_height])
 
-                letter = tile_font.render(board[x][y].letter, True, (0, 0, 0))
+                letter = tile_font.render(board.letter_at(x, y), True, (0, 0, 0))
                 screen.blit(letter, ((margin + square_width) * x + margin + x_offset + letter_x_offset,
                                      (margin + square_height) * y + margin + y_offset + 7))
 
-                letter_score = modifier_font.render(str(game.point_dict[board[x][y].letter]), True, (0, 0, 0))
+                letter_score = modifier_font.render(str(board.tile_score(x, y)), True, (0, 0, 0))
                 screen.blit(letter_score, ((margin + square_width) * x + margin + x_offset + 31,
                                            (margin + square_height) * y + margin + y_offset + 30))
 
-            elif "3LS" in board[x][y].modifier:
+            elif board.premium_at(x, y) == "3LS":
                 pygame.draw.rect(screen, (0, 100, 200), [(margin + square_width) * x + margin + x_offset,
                                                          (margin + square_height) * y + margin + y_offset,
                                                          square_width, square_height])
@@ -78,7 +46,7 @@ def draw_board(board):
                 screen.blit(text_bot, ((margin + square_width) * x + margin + x_offset + 5,
                                        (margin + square_height) * y + margin + y_offset + 27))
 
-            elif "2LS" in board[x][y].modifier:
+            elif board.premium_at(x, y) == "2LS":
                 pygame.draw.rect(screen, (173, 216, 230), [(margin + square_width) * x + margin + x_offset,
                                                            (margin + square_height) * y + margin + y_offset,
                                                            square_width, square_height])
@@ -92,7 +60,7 @@ def draw_board(board):
                 screen.blit(text_bot, ((margin + square_width) * x + margin + x_offset + 5,
                                        (margin + square_height) * y + margin + y_offset + 27))
 
-            elif "2WS" in board[x][y].modifier:
+            elif board.premium_at(x, y) == "2WS":
                 pygame.draw.rect(screen, (255, 204, 203), [(margin + square_width) * x + margin + x_offset,
                                                            (margin + square_height) * y + margin + y_offset,
                                                            square_width, square_height])
@@ -106,7 +74,7 @@ def draw_board(board):
                 screen.blit(text_bot, ((margin + square_width) * x + margin + x_offset + 5,
                                        (margin + square_height) * y + margin + y_offset + 27))
 
-            elif "3WS" in board[x][y].modifier:
+            elif board.premium_at(x, y) == "3WS":
                 pygame.draw.rect(screen, (237, 28, 36), [(margin + square_width) * x + margin + x_offset,
                                                          (margin + square_height) * y + margin + y_offset,
                                                          square_width, square_height])
@@ -214,9 +182,7 @@ if __name__ == "__main__":
                ["O"] * 8 + ["P"] * 2 + ["Q"] * 1 + ["R"] * 6 + ["S"] * 4 + ["T"] * 6 + ["U"] * 4 + \
                ["V"] * 2 + ["W"] * 2 + ["X"] * 1 + ["Y"] * 2 + ["Z"] * 1 + ["%"] * 2
 
-    to_load = open("lexicon/scrabble_words_complete.pickle", "rb")
-    root = pickle.load(to_load)
-    to_load.close()
+    root = open_dawg("lexicon/scrabble_words_complete.dawg")
     word_rack = random.sample(tile_bag, 7)
     [tile_bag.remove(letter) for letter in word_rack]
     game = ScrabbleBoard(root)
@@ -268,17 +234,18 @@ if __name__ == "__main__":
 
                 else:
                     game_state = "end_screen"
-                    for word in all_board_words(game.board):
-                        if not find_in_dawg(word, root) and word:
+                    words = all_board_words(game)
+                    for word, valid in zip(words, find_all_in_dawg(words, root)):
+                        if not valid:
                             raise Exception(f"Invalid word on board: {word}")
 
         if game_state == "end_screen":
-            draw_board(game.board)
+            draw_board(game)
             draw_rack(word_rack)
             draw_computer_score(game.word_score_dict)
             continue
 
-        draw_board(game.board)
+        draw_board(game)
         draw_rack(word_rack)
         draw_computer_score(game.word_score_dict)
         pygame.time.wait(75)
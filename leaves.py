@@ -0,0 +1,107 @@
+# Rack leave values: how much the tiles a move keeps on the rack are worth to the moves after it, in
+# points. The table holds a value for every multiset of 0 to 6 tiles (letters and blanks), 1,107,568 in
+# all, at the multiset's combinatorial rank, so looking a leave up is one array index.
+import math
+import struct
+
+import numpy as np
+
+from dawg import *
+
+# leave tiles are coded like rack tiles: letter codes, then the blank
+LEAVE_TILE_TYPES = len(LETTERS) + 1
+LEAVE_BLANK_CODE = len(LETTERS)
+MAX_LEAVE = 6
+
+# BINOMIALS[n][k] is n choose k, for every n and k a rank needs
+BINOMIALS = [[math.comb(n, k) for k in range(MAX_LEAVE + 1)] for n in range(LEAVE_TILE_TYPES + MAX_LEAVE)]
+# leaves are ranked by size first, SIZE_OFFSETS[k] is the rank of the first leave of k tiles
+SIZE_OFFSETS = [0]
+for _size in range(MAX_LEAVE + 1):
+    SIZE_OFFSETS.append(SIZE_OFFSETS[-1] + math.comb(LEAVE_TILE_TYPES + _size - 1, _size))
+NUM_LEAVES = SIZE_OFFSETS[-1]
+
+# Binary leave table format, all integers little-endian:
+#   header  magic b"LEAV", u16 version, u16 largest leave size, u32 leave count
+#   values  i16 * leave count, each leave's value in hundredths of a point, in rank order
+LEAVES_MAGIC = b"LEAV"
+LEAVES_VERSION = 1
+LEAVES_HEADER = struct.Struct("<4sHHI")
+
+
+# sorted tile codes of a leave given as letters, blanks as "%" or "?"
+def leave_codes(leave):
+    return sorted(LEAVE_BLANK_CODE if tile in BLANK_TILES else LETTER_CODES[tile] for tile in leave)
+
+
+# rank of a leave given as sorted tile codes. adding i to the i-th code turns the multiset into a set of
+# distinct numbers, which the combinatorial number system ranks among the sets of its size
+def leave_index(codes):
+    index = SIZE_OFFSETS[len(codes)]
+    for i, code in enumerate(codes):
+        index += BINOMIALS[code + i][i + 1]
+    return index
+
+
+# ranks of many leaves of the same size at once, given as a (leaves, size) array of sorted tile codes
+def leave_indexes(codes):
+    size = codes.shape[1]
+    binomials = np.array(BINOMIALS, dtype=np.int64)
+    index = np.full(len(codes), SIZE_OFFSETS[size], dtype=np.int64)
+    for i in range(size):
+        index += binomials[codes[:, i] + i, i + 1]
+    return index
+
+
+class LeaveTable:
+    def __init__(self, values, path=None):
+        # values in hundredths of a point, by rank
+        self.values = values
+        self.path = path
+
+    # tables are loaded once per process, pickling one only stores its path
+    def __reduce__(self):
+        if self.path is None:
+            raise Exception("Only leave tables opened with open_leaves can be pickled")
+        return open_leaves, (self.path,)
+
+    # value in points of a leave given as sorted tile codes
+    def value_of_codes(self, codes):
+        return int(self.values[leave_index(codes)]) / 100
+
+    # value in points of a leave given as letters, blanks as "%" or "?"
+    def value(self, leave):
+        return self.value_of_codes(leave_codes(leave))
+
+
+def save_leaves(values, path):
+    values = np.round(np.asarray(values) * 100).clip(-32768, 32767).astype("<i2")
+    if len(values) != NUM_LEAVES:
+        raise Exception(f"A leave table needs {NUM_LEAVES} values, got {len(values)}")
+    with open(path, "wb") as f:
+        f.write(LEAVES_HEADER.pack(LEAVES_MAGIC, LEAVES_VERSION, MAX_LEAVE, NUM_LEAVES))
+        f.write(values.tobytes())
+
+
+# leave tables by path, so each is only read once per process
+_tables = {}
+
+
+def open_leaves(path):
+    if path not in _tables:
+        with open(path, "rb") as f:
+            header = f.read(LEAVES_HEADER.size)
+            if len(header) < LEAVES_HEADER.size:
+                raise Exception(f"{path} is not a leave table")
+            magic, version, max_leave, num_leaves = LEAVES_HEADER.unpack(header)
+            if magic != LEAVES_MAGIC:
+                raise Exception(f"{path} is not a leave table")
+            if version != LEAVES_VERSION:
+                raise Exception(f"{path} has leave table version {version}, expected {LEAVES_VERSION}")
+            if max_leave != MAX_LEAVE or num_leaves != NUM_LEAVES:
+                raise Exception(f"{path} holds leaves of up to {max_leave} tiles, expected {MAX_LEAVE}")
+            values = np.fromfile(f, dtype="<i2")
+        if len(values) != NUM_LEAVES:
+            raise Exception(f"{path} is truncated or corrupt")
+        _tables[path] = LeaveTable(values, path)
+    return _tables[path]
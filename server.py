@@ -0,0 +1,279 @@
+# Long-running solver service. The lexicon is loaded once when the server starts and handed to a pool of
+# worker processes, and requests are served from there, so a client pays for a search but not for
+# unpickling the lexicon.
+#   python server.py [--socket PATH | --host HOST --port PORT] [--workers N] [--engine dawg|gaddag]
+#                    [--alphagrams] [--leaves] [--deadline SECONDS] [--max-queue N] [--cache-size N]
+# The protocol is one JSON object per line each way, over a Unix socket or localhost TCP. A request
+#   {"id": 1, "rows": [15 rows of 15 squares], "rack": "AEINST?", "moves": 10, "bag": 40, "deadline": 2.5}
+# gets back
+#   {"id": 1, "moves": [{"row": 7, "col": 3, "direction": "h", "word": "SaTIN", "score": 12, "tiles": "S?TIN"},
+#                       ...], "seconds": 0.012}
+# Rows hold "." for empty squares and lowercase letters for blanks, the rack "?" (or "%") for blanks. moves
+# is how many of the best moves to return, all of them if it is null. With --leaves moves are ranked by
+# equity while bag, the tiles left to draw, isn't 0, and each move also has its "equity". deadline is in
+# seconds from when the server reads the request, --deadline if not given. A request that doesn't get a
+# worker in time is never searched, and one that isn't done in time gets {"id": 1, "error": "deadline
+# exceeded"}. Any other problem with a request is an "error" too. {"op": "metrics"} returns the metrics.
+# Responses on a connection come back as their requests finish, matched up by id. Each worker remembers the
+# moves of the last --cache-size positions and racks it was asked about.
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dawg import *
+from alphagrams import open_alphagrams
+from leaves import open_leaves
+from board import ScrabbleBoard, place_rows, word_tiles
+from simulate import DAWG_PATH, GADDAG_PATH, ALPHAGRAMS_PATH, LEAVES_PATH
+from solver_client import HOST, PORT
+
+DEADLINE = 10.0
+# requests waiting for a worker before new ones are turned away
+MAX_QUEUE = 1000
+# latencies kept for the percentiles in the metrics
+METRICS_WINDOW = 1000
+# positions and racks whose moves each worker remembers, see ScrabbleBoard.top_moves
+CACHE_SIZE = 1000
+# longest request line read, a full board and rack is well under a kilobyte
+MAX_LINE = 1 << 16
+
+# empty board of this worker process, on its lexicons. every request is searched on a clone of it, which
+# shares its move cache and cross-check masks
+_worker_template = None
+
+
+def _init_solver_worker(dawg, gaddag, engine, alphagrams, leaves, cache_size):
+    global _worker_template
+    _worker_template = ScrabbleBoard(dawg, engine=engine, gaddag_root=gaddag, cache_size=cache_size,
+                                     alphagrams=alphagrams, leaves=leaves)
+
+
+# a task for each worker to run as it starts up
+def _ready(_):
+    return os.getpid()
+
+
+# the moves of a request, in a worker process. returns the moves as JSON objects, when the search started and
+# how long it took, or None if the request's deadline (time.monotonic) passed before it got here
+def _solve(rows, rack, count, bag, deadline):
+    started = time.monotonic()
+    if started > deadline:
+        return None
+    board = _worker_template.clone()
+    place_rows(board, rows)
+    board.tiles_in_bag = bag
+    key = board.move_key(rack)
+    moves = []
+    for move in board.top_moves(rack, count, key):
+        row, col, word, score, direction, rack_tiles = move
+        result = {"row": row, "col": col, "direction": direction,
+                  "word": "".join(letter.lower() if blank else letter for letter, blank in word_tiles(word)),
+                  "score": score, "tiles": "".join(rack_tiles).replace("%", "?")}
+        if key is not None:
+            result["equity"] = round(key(move), 2)
+        moves.append(result)
+    return moves, started, time.monotonic() - started
+
+
+# the position, rack, move count, bag and deadline of a solve request, checked before it is queued
+def parse_request(request, default_deadline):
+    rows = request.get("rows")
+    if not isinstance(rows, list) or len(rows) != 15 or \
+            not all(isinstance(line, str) and len(line) == 15 for line in rows):
+        raise Exception("rows must be 15 strings of 15 squares")
+    if any(square != "." and square.upper() not in LETTER_CODES for line in rows for square in line):
+        raise Exception("squares must be letters, lowercase for blanks, or . for empty")
+    rack = request.get("rack")
+    if not isinstance(rack, str) or not 0 < len(rack) <= 7:
+        raise Exception("rack must be a string of 1 to 7 tiles")
+    rack = rack.upper().replace("?", "%")
+    if any(tile != "%" and tile not in LETTER_CODES for tile in rack):
+        raise Exception("rack tiles must be letters or ? for blanks")
+    count = request.get("moves", 10)
+    if count is not None and (not isinstance(count, int) or isinstance(count, bool) or count < 1):
+        raise Exception("moves must be a positive number of moves or null")
+    bag = request.get("bag")
+    if bag is not None and (not isinstance(bag, int) or isinstance(bag, bool) or bag < 0):
+        raise Exception("bag must be the number of tiles left to draw")
+    deadline = request.get("deadline", default_deadline)
+    if not isinstance(deadline, (int, float)) or deadline <= 0:
+        raise Exception("deadline must be a positive number of seconds")
+    return rows, list(rack), count, bag, float(deadline)
+
+
+# value at fraction of the way through sorted values
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class SolverServer:
+    # dawg (and gaddag for the gaddag engine) are the lexicons, loaded by the caller. the workers get them
+    # and alphagrams and leaves as they start
+    def __init__(self, dawg, engine="dawg", gaddag=None, alphagrams=None, leaves=None, workers=1,
+                 deadline=DEADLINE, max_queue=MAX_QUEUE, cache_size=CACHE_SIZE):
+        if workers < 1:
+            raise Exception(f"Need at least one worker, got {workers}")
+        self.workers = workers
+        self.deadline = deadline
+        self.max_queue = max_queue
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_solver_worker,
+                                        initargs=(dawg, gaddag, engine, alphagrams, leaves, cache_size))
+        self.started = time.monotonic()
+        # requests handed to the pool that it isn't done with yet, and the most of them waiting for a worker at
+        # once
+        self.in_flight = 0
+        self.max_queued = 0
+        self.counts = {"requests": 0, "served": 0, "errors": 0, "expired": 0, "rejected": 0}
+        # seconds from reading a request to answering it, waiting for a worker and searching, of the last
+        # METRICS_WINDOW requests served
+        self.latencies = collections.deque(maxlen=METRICS_WINDOW)
+        self.waits = collections.deque(maxlen=METRICS_WINDOW)
+        self.searches = collections.deque(maxlen=METRICS_WINDOW)
+
+    # start every worker before the first request
+    def warm_up(self):
+        list(self.pool.map(_ready, range(self.workers)))
+
+    # requests waiting for a free worker
+    def queued(self):
+        return max(0, self.in_flight - self.workers)
+
+    def metrics(self):
+        metrics = {"uptime": time.monotonic() - self.started, "workers": self.workers, **self.counts,
+                   "in_flight": self.in_flight, "queued": self.queued(), "max_queued": self.max_queued}
+        for name, values in (("latency", self.latencies), ("wait", self.waits), ("search", self.searches)):
+            for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+                metrics[f"{name}_{label}"] = percentile(values, fraction)
+        return metrics
+
+    def _finished(self):
+        self.in_flight -= 1
+
+    async def solve(self, request):
+        received = time.monotonic()
+        rows, rack, count, bag, timeout = parse_request(request, self.deadline)
+        if self.queued() >= self.max_queue:
+            self.counts["rejected"] += 1
+            raise Exception("server busy")
+        future = self.pool.submit(_solve, rows, rack, count, bag, received + timeout)
+        # a search that has started runs on past its deadline, the request counts until the pool is done with
+        # it. done callbacks run on the pool's thread
+        self.in_flight += 1
+        self.max_queued = max(self.max_queued, self.queued())
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._finished))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            result = None
+        if result is None:
+            self.counts["expired"] += 1
+            raise Exception("deadline exceeded")
+        moves, started, seconds = result
+        self.counts["served"] += 1
+        self.latencies.append(time.monotonic() - received)
+        self.waits.append(started - received)
+        self.searches.append(seconds)
+        return {"moves": moves, "seconds": seconds}
+
+    async def respond(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise Exception("requests must be JSON objects")
+            request_id = request.get("id")
+            self.counts["requests"] += 1
+            op = request.get("op", "solve")
+            if op == "metrics":
+                response = {"metrics": self.metrics()}
+            elif op == "solve":
+                response = await self.solve(request)
+            else:
+                raise Exception(f"Unknown op {op}")
+        except Exception as e:
+            if str(e) not in ("deadline exceeded", "server busy"):
+                self.counts["errors"] += 1
+            response = {"error": str(e)}
+        writer.write((json.dumps({"id": request_id, **response}) + "\n").encode())
+        await writer.drain()
+
+    # read requests off a connection until it closes, each one answered as soon as it is done
+    async def handle(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(self.respond(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # serve on socket_path, or host and port if it is None, until SIGINT or SIGTERM
+    async def serve(self, host=HOST, port=PORT, socket_path=None):
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(self.handle, socket_path, limit=MAX_LINE)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+            address = f"{host}:{port}"
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"serving on {address} with {self.workers} workers", flush=True)
+        async with server:
+            await stop.wait()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve ranked moves over a local socket")
+    parser.add_argument("--socket", default=None)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--engine", choices=("dawg", "gaddag"), default="dawg")
+    parser.add_argument("--alphagrams", action="store_true")
+    parser.add_argument("--leaves", action="store_true")
+    parser.add_argument("--deadline", type=float, default=DEADLINE)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    solver = SolverServer(open_dawg(DAWG_PATH), engine=args.engine,
+                          gaddag=open_dawg(GADDAG_PATH) if args.engine == "gaddag" else None,
+                          alphagrams=open_alphagrams(ALPHAGRAMS_PATH) if args.alphagrams else None,
+                          leaves=open_leaves(LEAVES_PATH) if args.leaves else None,
+                          workers=args.workers, deadline=args.deadline, max_queue=args.max_queue,
+                          cache_size=args.cache_size)
+    solver.warm_up()
+    print(f"lexicon loaded and workers started in {time.perf_counter() - start:.2f}s", flush=True)
+    try:
+        asyncio.run(solver.serve(args.host, args.port, args.socket))
+    finally:
+        solver.close()
+        print(json.dumps(solver.metrics()))
@@ -0,0 +1,115 @@
+# Plays self-play games of the solver on a pool of worker processes and streams one JSON line per game to a
+# results file, then reports games per second and score statistics.
+#   python simulate.py [--games N] [--workers N] [--seed S] [--engine dawg|gaddag] [--results PATH] [--stats]
+#                      [--check-words board|move] [--alphagrams] [--leaves]
+# Game i is drawn from random.Random(seed + i) and its seed is saved with its result, so any game can be
+# replayed on its own with play_game(root, random.Random(seed)). With --stats every result also holds the
+# board's per-turn counters and phase times. After every turn the words on the board are checked against
+# the lexicon, all of them or with --check-words move only the words the move formed. With --alphagrams
+# opening moves are looked up in the alphagram index instead of searched for. With --leaves the solver plays
+# in equity mode, ranking moves by score plus the value of the tiles they leave (see derive_leaves.py).
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dawg import *
+from alphagrams import open_alphagrams
+from leaves import open_leaves
+from board import play_game
+
+DAWG_PATH = "lexicon/scrabble_words_complete.dawg"
+GADDAG_PATH = "lexicon/scrabble_words_complete.gaddag"
+ALPHAGRAMS_PATH = "lexicon/scrabble_words_complete.alphagrams"
+LEAVES_PATH = "lexicon/scrabble_words_complete.leaves"
+
+# lexicon and board arguments of this worker process, loaded once when it starts
+_worker_root = None
+_worker_board_args = {}
+
+
+def _init_worker(engine, stats, check_words="board", alphagrams=False, leaves=False):
+    global _worker_root, _worker_board_args
+    _worker_root = open_dawg(DAWG_PATH)
+    _worker_board_args = {"engine": engine, "stats": stats, "check_words": check_words}
+    if alphagrams:
+        _worker_board_args["alphagrams"] = open_alphagrams(ALPHAGRAMS_PATH)
+    if leaves:
+        _worker_board_args["leaves"] = open_leaves(LEAVES_PATH)
+    if engine == "gaddag":
+        _worker_board_args["gaddag_root"] = open_dawg(GADDAG_PATH)
+
+
+def _play(game, seed):
+    record = play_game(_worker_root, random.Random(seed), verbose=False, **_worker_board_args)
+    return {"game": game, "seed": seed, **record}
+
+
+def summarize(results, elapsed):
+    scores = [result["score"] for result in results]
+    turn_times = [turn_time for result in results for turn_time in result["turn_times"]]
+    return {
+        "games": len(results),
+        "elapsed": elapsed,
+        "games_per_second": len(results) / elapsed,
+        "score_mean": statistics.mean(scores),
+        "score_stdev": statistics.stdev(scores) if len(scores) > 1 else 0.0,
+        "score_min": min(scores),
+        "score_median": statistics.median(scores),
+        "score_max": max(scores),
+        "turns_mean": statistics.mean(result["turns"] for result in results),
+        "bingos_per_game": sum(result["bingos"] for result in results) / len(results),
+        "turn_time_mean": statistics.mean(turn_times),
+        "turn_time_max": max(turn_times),
+    }
+
+
+# play games games from seeds seed, seed + 1, ... and write each result to results_path as it finishes
+def simulate(games, workers, seed, engine, results_path, stats=False, check_words="board", alphagrams=False,
+             leaves=False):
+    results = []
+    start = time.perf_counter()
+    with open(results_path, "w") as f:
+        if workers == 1:
+            _init_worker(engine, stats, check_words, alphagrams, leaves)
+            finished = (_play(game, seed + game) for game in range(games))
+        else:
+            pool = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                       initargs=(engine, stats, check_words, alphagrams, leaves))
+            finished = (future.result() for future in
+                        as_completed([pool.submit(_play, game, seed + game) for game in range(games)]))
+        for result in finished:
+            results.append(result)
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+        if workers > 1:
+            pool.shutdown()
+    return summarize(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play self-play games of the solver in parallel")
+    parser.add_argument("--games", type=int, default=150)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=("dawg", "gaddag"), default="dawg")
+    parser.add_argument("--results", default="self_play.jsonl")
+    parser.add_argument("--stats", action="store_true", help="record per-turn search counters and phase times")
+    parser.add_argument("--check-words", choices=("board", "move"), default="board",
+                        help="check every word on the board after each turn, or only the words the move formed")
+    parser.add_argument("--alphagrams", action="store_true", help="look opening moves up in the alphagram index")
+    parser.add_argument("--leaves", action="store_true", help="rank moves by score plus the value of their leave")
+    args = parser.parse_args()
+
+    summary = simulate(args.games, args.workers, args.seed, args.engine, args.results, args.stats,
+                       args.check_words, args.alphagrams, args.leaves)
+    print(f"{summary['games']} games in {summary['elapsed']:.1f}s, "
+          f"{summary['games_per_second']:.2f} games/s with {args.workers} workers")
+    print(f"score: mean {summary['score_mean']:.1f}, stdev {summary['score_stdev']:.1f}, "
+          f"min {summary['score_min']}, median {summary['score_median']}, max {summary['score_max']}")
+    print(f"turns per game {summary['turns_mean']:.1f}, bingos per game {summary['bingos_per_game']:.2f}, "
+          f"turn time mean {summary['turn_time_mean'] * 1000:.1f}ms, max {summary['turn_time_max'] * 1000:.1f}ms")
+    print(f"results written to {args.results}")
@@ -0,0 +1,67 @@
+# Client of the solver service in server.py. One client is one connection, sending a request and waiting for
+# its response, so a program that wants several requests in flight at once opens several clients.
+#   client = SolverClient(socket_path="/tmp/solver.sock")   # or SolverClient(host, port)
+#   moves = client.solve(board_rows(board), "AEINST?", count=5)
+import json
+import socket
+
+# where server.py listens by default
+HOST = "127.0.0.1"
+PORT = 7654
+
+
+class SolverClient:
+    # connect to the server on socket_path, or host and port if it is None. timeout is how many seconds any
+    # socket operation may take, None to wait as long as it takes
+    def __init__(self, host=HOST, port=PORT, socket_path=None, timeout=None):
+        if socket_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(socket_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+        self.next_id = 0
+
+    # send request and return the response to it. an error response, a bad request, an expired deadline or
+    # a busy server, raises its error
+    def request(self, request):
+        self.next_id += 1
+        request = {"id": self.next_id, **request}
+        self.sock.sendall((json.dumps(request) + "\n").encode())
+        line = self.file.readline()
+        if not line:
+            raise Exception("server closed the connection")
+        response = json.loads(line)
+        if response.get("id") != self.next_id:
+            raise Exception(f"response {response.get('id')} to request {self.next_id}")
+        if "error" in response:
+            raise Exception(response["error"])
+        return response
+
+    # the best moves for rack on the board of rows (see board.board_rows), best first, as dicts of row, col,
+    # direction, word (blanks lowercase), score, the rack tiles used ("?" for blanks) and the equity if the
+    # server ranks by it. count None returns every move, bag is the number of tiles left to draw and
+    # deadline the seconds the server has to answer, its default if None
+    def solve(self, rows, rack, count=10, bag=None, deadline=None):
+        request = {"rows": list(rows), "rack": "".join(rack), "moves": count}
+        if bag is not None:
+            request["bag"] = bag
+        if deadline is not None:
+            request["deadline"] = deadline
+        return self.request(request)["moves"]
+
+    # request counts, queue depth and latency percentiles of the server, see SolverServer.metrics
+    def metrics(self):
+        return self.request({"op": "metrics"})["metrics"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()